@@ -1,62 +1,286 @@
-import xml.dom.minidom
+import os
+import sys
+import csv
+import time
+import json
+import heapq
+import argparse
+import collections
+import concurrent.futures
 import openreview
 import xml.etree.ElementTree as ET
+from tqdm import tqdm
+from affiliation_index import AffiliationIndex, DOMAIN_MAP_PATH, INSTITUTION_MAP_PATH
+
+# The profile cache is shared with the Google Sheets pipeline in gs_utils
+GS_UTILS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gs_utils')
+if GS_UTILS_DIR not in sys.path:
+    sys.path.append(GS_UTILS_DIR)
+from src.constants import CACHE_DIR
+from src.profile_cache import ProfileCache, fetch_profile_tmdates, match_requested
+from src.venue_snapshot import (
+    save_snapshot,
+    load_snapshot,
+    note_to_json,
+    note_from_json,
+    profile_to_json,
+    profile_from_json,
+)
 
 
-import time
-import pandas as pd
-import multiprocessing as mp
-from multiprocessing import Pool
-from tqdm import tqdm
-import pandas as pd
-import requests
+# Define the conference ID and the track name
+# 'acmmm.org/ACMMM/2024/Track/Demo'
+VENUE_ID = 'acmmm.org/ACMMM/2024/Conference'
+TRACK_NAME = 'main_appeal'  # BNI, GC, Demo
+
+# only export these paper numbers, leave empty to export all papers
+# NOTE: to add newly accepted papers (e.g. after an appeal) use --incremental instead
+NEWLY_ID = []
+
+# Profiles are searched in batches, the OpenReview API returns at most 1000 per request
+PROFILE_BATCH_SIZE = 1000
+
+# Indentation used for each level of the exported XML
+XML_INDENT = ' '
+
+# Number of worker threads for profile fetching and paper rendering, 1 means a serial run
+MAX_WORKERS = 8
+
+# On-disk profile cache, the same file is used by gs_utils so both reuse each other's profiles
+PROFILE_CACHE_PATH = os.path.join(GS_UTILS_DIR, CACHE_DIR, 'profiles.sqlite')
+
+# Default snapshot of the exported notes and profiles, read offline by validate_paperLoad.py
+EXPORT_SNAPSHOT_PATH = os.path.join(GS_UTILS_DIR, CACHE_DIR, 'export_snapshot.json.gz')
 
 
 # Authenticate with OpenReview
-client = openreview.api.OpenReviewClient(
-    baseurl='https://api2.openreview.net',
-    username="",  # YOUR OPENREVIEW USERNAME e.g., email
-    password=""  # YOUR OPENREVIEW PASSWD
-)
+def get_client():
+    return openreview.api.OpenReviewClient(
+        baseurl='https://api2.openreview.net',
+        username="",  # YOUR OPENREVIEW USERNAME e.g., email
+        password=""  # YOUR OPENREVIEW PASSWD
+    )
+
+
+# Split a list into chunks of at most batch_size items
+def batches(items, batch_size=PROFILE_BATCH_SIZE):
+    for i in range(0, len(items), batch_size):
+        yield items[i:i + batch_size]
+
+
+# Apply func to every item with a pool of threads, yielding the results in input order
+def ordered_map(func, items, max_workers=MAX_WORKERS):
+    """
+    Like executor.map, but only keeps a bounded window of tasks in flight so
+    results that are not consumed yet do not pile up in memory.
+    """
+    if max_workers <= 1:
+        yield from map(func, items)
+        return
+
+    window = max_workers * 4
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = collections.deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Resolve all author ids of a track in a few bulk requests
+def search_author_profiles(client, author_ids, batch_size=PROFILE_BATCH_SIZE, max_workers=MAX_WORKERS):
+    """
+    Map every author id (tilde id or email) to its OpenReview profile.
+
+    Ids are deduplicated first, then tilde ids and emails are searched in
+    separate batched requests, up to `max_workers` batches at a time. Ids
+    without a profile ("ghost" authors) are simply missing from the returned
+    dictionary.
+    """
+    unique_ids = list(dict.fromkeys(author_ids))
+    tilde_ids = [author_id for author_id in unique_ids if author_id.startswith('~')]
+    emails = [author_id for author_id in unique_ids if not author_id.startswith('~')]
+
+    def search_batch(query):
+        key, batch = query
+        if key == 'ids':
+            return client.search_profiles(ids=batch)
+        return client.search_profiles(confirmedEmails=batch)
+
+    queries = [('ids', batch) for batch in batches(tilde_ids, batch_size)]
+    queries += [('confirmedEmails', batch) for batch in batches(emails, batch_size)]
+
+    profile_map = {}
+    for (key, _), result in zip(queries, ordered_map(search_batch, queries, max_workers)):
+        if key == 'ids':
+            for profile in result:
+                profile_map[profile.id] = profile
+                # A profile may be referenced by any of its names, e.g. ~Old_Name1
+                for name in profile.content.get('names', []):
+                    if name.get('username'):
+                        profile_map[name['username']] = profile
+        else:
+            for email, profile in result.items():
+                profile_map[email] = profile
+    # The searched emails come back lowercase, authors are looked up with the spelling of their note
+    profile_map.update(match_requested(emails, profile_map))
+
+    return profile_map
+
+
+def get_author_profiles(client, author_ids, batch_size=PROFILE_BATCH_SIZE, max_workers=MAX_WORKERS,
+                        profile_cache=None):
+    """
+    Same as search_author_profiles, but when a ProfileCache is given only the
+    authors that are not cached, or whose entry expired and whose profile
+    was modified since, are searched.
+    """
+    if profile_cache is None:
+        return search_author_profiles(client, author_ids, batch_size, max_workers)
+    return profile_cache.get_many(
+        author_ids, lambda keys: search_author_profiles(client, keys, batch_size, max_workers),
+        lambda profile_ids: fetch_profile_tmdates(client, profile_ids, batch_size))
+
+
+# Write the authors without an OpenReview profile to a csv report
+def write_ghost_report(ghost_authors, report_path):
+    with open(report_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['event_tracking_number', 'sequence_no', 'author_id', 'author_name'])
+        writer.writerows(ghost_authors)
+
+
+# Output file prefix, e.g. ACMMM_2024_Conference_main
+def get_output_prefix(venue_id, track_name):
+    return '_'.join(venue_id.split('/')[1:] + [track_name])
+
+
+# ----- XML building utils -----
+def build_parent_data(venue_id):
+    parent_data = ET.Element('parent_data')
+    proceeding = ET.SubElement(parent_data, 'proceeding')
+    proceeding.text = str(venue_id)  # Ensure this is a string
+
+    volume = ET.SubElement(parent_data, 'volume')
+    volume.text = ''
+    issue = ET.SubElement(parent_data, 'issue')
+    issue.text = ''
+    issue_date = ET.SubElement(parent_data, 'issue_date')
+    issue_date.text = ''
+    source = ET.SubElement(parent_data, 'source')
+    source.text = ''
+    return parent_data
+
+
+# Current positions of a profile, i.e. history entries without an end date
+def current_history(profile):
+    history = profile.content.get('history') or [{}]
+    current = [entry for entry in history if entry.get('end') is None]
+    # Nobody is current, keep the latest entry as before
+    return current or history[:1]
+
+
+def build_affiliations(profile, email, affiliation_index=None):
+    """
+    One <affiliation> per current history entry. Location fields come from
+    the profile when set, otherwise from the affiliation index, looked up by
+    institution name, institution domain, then email domain.
+    """
+    affiliations = ET.Element('affiliations')
+    for k, entry in enumerate(current_history(profile)):
+        institution_info = entry.get('institution', {})
+        location = {}
+        if affiliation_index is not None:
+            location = affiliation_index.lookup(institution_info.get('name', ''),
+                                                [institution_info.get('domain', ''), email])
 
+        affiliation = ET.SubElement(affiliations, 'affiliation')
+        institution = ET.SubElement(affiliation, 'institution')
+        institution.text = institution_info.get('name', 'N/A')
+        department = ET.SubElement(affiliation, 'department')
+        department.text = institution_info.get('department', '')
 
-# Define the conference ID and the accepted papers invitation ID
-# 'acmmm.org/ACMMM/2024/Track/Demo'
-venue_id = 'acmmm.org/ACMMM/2024/Conference'
-venue_group = client.get_group(venue_id)
-submission_name = venue_group.content['submission_name']['value']
-track_name = 'main_appeal'  # BNI, GC, Demo
+        city = ET.SubElement(affiliation, 'city')
+        city.text = institution_info.get('city') or location.get('city', '')
+        state_province = ET.SubElement(affiliation, 'state_province')
+        state_province.text = institution_info.get('stateProvince') or location.get('state_province', '')
+        country = ET.SubElement(affiliation, 'country')
+        country.text = institution_info.get('country') or location.get('country', '')
+
+        institute_sequence_no = ET.SubElement(affiliation, 'sequence_no')
+        institute_sequence_no.text = str(k+1)
+    return affiliations
+
+
+# The preferred email of a profile, None when the author did not set one (the API key is `preferredEmail`)
+def preferred_email(profile):
+    return profile.content.get('preferredEmail') or None
+
+
+def build_author(profile, i, affiliation_index=None):
+    author = ET.Element('author')
+
+    prefix = ET.SubElement(author, 'prefix')
+    prefix.text = ''
+
+    first_name = ET.SubElement(author, 'first_name')
+    first_name.text = profile.content.get(
+        'names', [{}])[0].get('first', 'N/A')
+
+    middle_name = ET.SubElement(author, 'middle_name')
+    middle_name.text = ''
+
+    last_name = ET.SubElement(author, 'last_name')
+    last_name.text = profile.content.get(
+        'names', [{}])[0].get('last', 'N/A')
+
+    suffix = ET.SubElement(author, 'suffix')
+    suffix.text = ''
+
+    # for those user who do not set first and last name
+    if first_name.text == 'N/A' and last_name.text == 'N/A':
+        full_name = profile.content.get(
+            'names', [{}])[0].get('fullname', 'N/A')
+        parts = full_name.strip().split()
+        first_name.text = " ".join(parts[:-1])
+        last_name.text = parts[-1]
+
+    email = preferred_email(profile)
+
+    # handle for those who did not set preferred emails
+    if email is None:
+        email = (profile.content.get('emails') or ['N/A'])[0]
 
+    author.append(build_affiliations(profile, email, affiliation_index))
 
-notes = client.get_all_notes(
-    invitation=f'{venue_id}/-/{submission_name}')
+    sequence_no = ET.SubElement(author, 'sequence_no')
+    sequence_no.text = str(i+1)
 
+    email_address = ET.SubElement(author, 'email_address')
+    email_address.text = email
 
-# notes = client.get_all_notes(content={'venueid': venue_id})
+    # first author as contact author
+    contact_author = ET.SubElement(author, 'contact_author')
+    contact_author.text = 'Y' if i == 0 else 'N'
 
-# Create a new XML tree structure with parent data
-new_root = ET.Element('erights_record')
+    ACM_profile_id = ET.SubElement(author, 'ACM_profile_id')
+    ACM_profile_id.text = ''
+    ACM_client_no = ET.SubElement(author, 'ACM_client_no')
+    ACM_client_no.text = ''
 
-# Add parent_data
-parent_data = ET.SubElement(new_root, 'parent_data')
-proceeding = ET.SubElement(parent_data, 'proceeding')
-proceeding.text = str(venue_id)  # Ensure this is a string
+    ORCID = ET.SubElement(author, 'ORCID')
+    ORCID.text = profile.content.get(
+        'orcid', ' ')
+    if ORCID.text != 'N/A':
+        ORCID.text = ORCID.text.split('/')[-1]
 
-volume = ET.SubElement(parent_data, 'volume')
-volume.text = ''
-issue = ET.SubElement(parent_data, 'issue')
-issue.text = ''
-issue_date = ET.SubElement(parent_data, 'issue_date')
-issue_date.text = ''
-source = ET.SubElement(parent_data, 'source')
-source.text = ''
+    return author
 
-# filter the newly accepted papers
-newly_id = [2935, 1166]
-notes = [note for note in notes if note.number in newly_id]
 
-for note in tqdm(notes):
-    paper = ET.SubElement(new_root, 'paper')
+def build_paper(note, profile_map, ghost_authors, affiliation_index=None):
+    paper = ET.Element('paper')
 
     paper_type = ET.SubElement(paper, 'paper_type')
     paper_type.text = 'Full Paper'  # You can adjust this as per your requirements
@@ -82,114 +306,347 @@ for note in tqdm(notes):
     authors_element = ET.SubElement(paper, 'authors')
     authors_list = [] if not note.content.get(
         'authorids') else note.content['authorids']['value']
+    author_names = note.content.get('authors', {}).get('value', [])
 
     for i, author_id in enumerate(authors_list):
-        # profile = client.get_profile(author_id)
-        profile = openreview.tools.get_profiles(client, [author_id])
+        profile = profile_map.get(author_id)
 
         # Those "ghost" users...
-        if len(profile) == 0:
-            print(f"Profile not found for {author_id}")
+        if profile is None:
+            author_name = author_names[i] if i < len(author_names) else ''
+            ghost_authors.append([note.number, i + 1, author_id, author_name])
             continue
-        profile = profile[0]
-
-        author = ET.SubElement(authors_element, 'author')
-
-        prefix = ET.SubElement(author, 'prefix')
-        prefix.text = ''
-
-        first_name = ET.SubElement(author, 'first_name')
-        first_name.text = profile.content.get(
-            'names', [{}])[0].get('first', 'N/A')
-
-        middle_name = ET.SubElement(author, 'middle_name')
-        middle_name.text = ''
-
-        last_name = ET.SubElement(author, 'last_name')
-        last_name.text = profile.content.get(
-            'names', [{}])[0].get('last', 'N/A')
-
-        suffix = ET.SubElement(author, 'suffix')
-        suffix.text = ''
-
-        # for those user who do not set first and last name
-        if first_name.text == 'N/A' and last_name.text == 'N/A':
-            full_name = profile.content.get(
-                'names', [{}])[0].get('fullname', 'N/A')
-            parts = full_name.strip().split()
-            first_name.text = " ".join(parts[:-1])
-            last_name.text = parts[-1]
-
-        affiliations = ET.SubElement(author, 'affiliations')
-        affiliation = ET.SubElement(affiliations, 'affiliation')
-        institution = ET.SubElement(affiliation, 'institution')
-        institution_info = profile.content.get(
-            'history', [{}])[0].get('institution', {}).get('name', 'N/A')
-        department = ET.SubElement(affiliation, 'department')
-        department.text = ''
-
-        sequence_no = ET.SubElement(author, 'sequence_no')
-        sequence_no.text = str(i+1)
-
-        institution.text = institution_info
-
-        city = ET.SubElement(affiliation, 'city')
-        city.text = ''
-        state_province = ET.SubElement(affiliation, 'state_province')
-        state_province.text = ''
-        country = ET.SubElement(affiliation, 'country')
-        country.text = ''
-
-        # only consider one institute per author
-        institute_sequence_no = ET.SubElement(affiliation, 'sequence_no')
-        institute_sequence_no.text = '1'
-
-        email_address = ET.SubElement(author, 'email_address')
-
-        email = profile.content.get('preferred_email', 'N/A')
-
-        # handle for those who did not set preferred emails
-        if email == 'N/A':
-            email = profile.content.get('emails', ['N/A'])[0]
-        email_address.text = email
-
-        # first author as contact author
-        contact_author = ET.SubElement(author, 'contact_author')
-        contact_author.text = 'Y' if i == 0 else 'N'
-
-        ACM_profile_id = ET.SubElement(author, 'ACM_profile_id')
-        ACM_profile_id.text = ''
-        ACM_client_no = ET.SubElement(author, 'ACM_client_no')
-        ACM_client_no.text = ''
-
-        ORCID = ET.SubElement(author, 'ORCID')
-        ORCID.text = profile.content.get(
-            'orcid', ' ')
-        if ORCID.text != 'N/A':
-            ORCID.text = ORCID.text.split('/')[-1]
-
-
-# Convert the new XML tree to a string
-new_tree = ET.ElementTree(new_root)
-new_tree.write('{}_paperLoad.xml'.format('_'.join(venue_id.split(
-    '/')[1:] + [track_name])), encoding='utf-8', xml_declaration=True)
-
-print("XML data export completed.")
-
-# Pretty print the XML
-
-
-def pretty_print_xml(elem):
-    rough_string = ET.tostring(elem, 'utf-8')
-    reparsed = xml.dom.minidom.parseString(rough_string)
-    return reparsed.toprettyxml(indent=" ")
-
-
-pretty_xml_as_string = pretty_print_xml(new_root)
-
 
-# Save the pretty printed XML to a file
-new_xml_file_path = '{}_paperLoad.xml'.format('_'.join(venue_id.split(
-    '/')[1:] + [track_name]))
-with open(new_xml_file_path, 'w', encoding='utf-8') as f:
-    f.write(pretty_xml_as_string)
+        authors_element.append(build_author(profile, i, affiliation_index))
+
+    return paper
+
+
+# ----- XML writing utils -----
+# Escape text the same way as xml.dom.minidom, so the output matches the former pretty printed files
+def escape_text(text):
+    return (text.replace('&', '&amp;').replace('<', '&lt;')
+            .replace('"', '&quot;').replace('>', '&gt;'))
+
+
+def serialize_element(elem, level=0, indent=XML_INDENT):
+    """
+    Serialize an element with one tag per line, indented by its depth.
+    """
+    pad = indent * level
+    children = list(elem)
+    if children:
+        return ''.join(
+            [f'{pad}<{elem.tag}>\n']
+            + [serialize_element(child, level + 1, indent) for child in children]
+            + [f'{pad}</{elem.tag}>\n']
+        )
+    if elem.text:
+        return f'{pad}<{elem.tag}>{escape_text(elem.text)}</{elem.tag}>\n'
+    return f'{pad}<{elem.tag}/>\n'
+
+
+def write_paperload(xml_file_path, parent_data, papers):
+    """
+    Stream the erights_record to disk in a single pass.
+
+    `papers` can be any iterable of <paper> elements or of already serialized
+    paper fragments, e.g. a generator, each paper is written as soon as it is
+    produced and is not kept in memory.
+    """
+    with open(xml_file_path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" ?>\n<erights_record>\n')
+        f.write(serialize_element(parent_data, level=1))
+        for paper in papers:
+            f.write(paper if isinstance(paper, str) else serialize_element(paper, level=1))
+        f.write('</erights_record>\n')
+
+
+# Build and serialize a single paper, returns the XML fragment and the ghost authors found
+def render_paper(note, profile_map, affiliation_index=None):
+    ghost_authors = []
+    paper = build_paper(note, profile_map, ghost_authors, affiliation_index)
+    return serialize_element(paper, level=1), ghost_authors
+
+
+def render_papers(notes, profile_map, ghost_authors, max_workers=MAX_WORKERS, affiliation_index=None):
+    """
+    Render the papers with a pool of workers, yielding the XML fragments
+    ordered by event_tracking_number. The output is identical to a serial run.
+    """
+    notes = sorted(notes, key=lambda note: note.number)
+    results = ordered_map(lambda note: render_paper(note, profile_map, affiliation_index), notes, max_workers)
+    for fragment, paper_ghost_authors in tqdm(results, total=len(notes)):
+        ghost_authors.extend(paper_ghost_authors)
+        yield fragment
+
+
+# ----- Track export utils -----
+# Fetch the accepted papers of a track, optionally keeping only the given paper numbers
+def fetch_track_notes(client, venue_id, paper_numbers=None):
+    # Accepted papers carry the venue id itself as venueid, rejected, withdrawn and desk rejected ones do not
+    notes = client.get_all_notes(content={'venueid': venue_id})
+
+    if paper_numbers:
+        notes = [note for note in notes if note.number in paper_numbers]
+    return notes
+
+
+# ----- Incremental export utils -----
+# Everything a <paper> block is rendered from: the note mdate, the tmdate of each author profile
+# and the version of the affiliation index
+def paper_inputs(note, profile_map, affiliation_index=None):
+    authorids = note.content.get('authorids', {}).get('value', [])
+    return {
+        'mdate': getattr(note, 'mdate', None),
+        'authors': [[author_id, getattr(profile_map.get(author_id), 'tmdate', None)] for author_id in authorids],
+        'affiliation_index': getattr(affiliation_index, 'version', None),
+    }
+
+
+def load_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+
+# Stream the <paper> blocks of an existing paperLoad XML as (event_tracking_number, fragment) pairs
+def iter_existing_papers(xml_file_path):
+    if not os.path.exists(xml_file_path):
+        return
+    context = ET.iterparse(xml_file_path, events=('start', 'end'))
+    _, root = next(context)
+    for event, elem in context:
+        if event == 'end' and elem.tag == 'paper':
+            yield int(elem.findtext('event_tracking_number')), serialize_element(elem, level=1)
+            # Drop the parsed papers so memory stays flat
+            root.clear()
+
+
+def export_track(venue_id, track_name, notes, profile_map, max_workers=MAX_WORKERS,
+                 incremental=False, write_delta=False, affiliation_index=None):
+    """
+    Write {venue}_{track}_paperLoad.xml for one track, plus the ghost author
+    report if needed.
+
+    A manifest of the inputs and ghost authors of every paper is saved next
+    to the XML. In incremental mode only the papers that are new or whose
+    inputs changed since the last export are rendered again and spliced into
+    the existing XML; with `write_delta` they are also written to a separate
+    {venue}_{track}_delta_paperLoad.xml. The ghost author report always
+    covers every paper of the XML. Returns the number of ghost authors and
+    of rendered papers.
+    """
+    ghost_authors = []
+    output_prefix = get_output_prefix(venue_id, track_name)
+    xml_file_path = f'{output_prefix}_paperLoad.xml'
+    manifest_path = f'{output_prefix}_manifest.json'
+    inputs = {str(note.number): paper_inputs(note, profile_map, affiliation_index) for note in notes}
+    previous_manifest = {}
+
+    if not incremental:
+        papers = render_papers(notes, profile_map, ghost_authors, max_workers=max_workers,
+                               affiliation_index=affiliation_index)
+        write_paperload(xml_file_path, build_parent_data(venue_id), papers)
+        changed_numbers = {note.number for note in notes}
+        rendered_count = len(notes)
+    else:
+        previous_manifest = load_manifest(manifest_path) if os.path.exists(xml_file_path) else {}
+        # Entries of an older manifest format have no 'inputs' and are rendered again
+        changed_notes = sorted(
+            [note for note in notes
+             if previous_manifest.get(str(note.number), {}).get('inputs') != inputs[str(note.number)]],
+            key=lambda note: note.number
+        )
+        changed_numbers = {note.number for note in changed_notes}
+        removed = set(previous_manifest) - set(inputs)
+        print(f"{track_name}: {len(changed_notes)} new or changed papers, {len(removed)} removed")
+
+        # Only a handful of papers change between two exports, keep them in memory for the delta file
+        rendered = list(zip(sorted(changed_numbers),
+                            render_papers(changed_notes, profile_map, ghost_authors, max_workers=max_workers,
+                                          affiliation_index=affiliation_index)))
+        kept = ((number, fragment) for number, fragment in iter_existing_papers(xml_file_path)
+                if str(number) in inputs and number not in changed_numbers)
+
+        # Both streams are ordered by event_tracking_number, so the merged file is as well
+        tmp_file_path = f'{xml_file_path}.tmp'
+        merged = heapq.merge(kept, rendered, key=lambda paper: paper[0])
+        write_paperload(tmp_file_path, build_parent_data(venue_id), (fragment for _, fragment in merged))
+        os.replace(tmp_file_path, xml_file_path)
+
+        if write_delta:
+            write_paperload(f'{output_prefix}_delta_paperLoad.xml', build_parent_data(venue_id),
+                            (fragment for _, fragment in rendered))
+        rendered_count = len(rendered)
+
+    # The ghost authors of the rendered papers, the kept papers keep the ones of the previous export
+    ghosts = {number: [] for number in inputs}
+    for row in ghost_authors:
+        ghosts[str(row[0])].append(row)
+    manifest = {
+        number: {
+            'inputs': inputs[number],
+            'ghosts': ghosts[number] if int(number) in changed_numbers else previous_manifest[number]['ghosts'],
+        }
+        for number in inputs
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+
+    # Rewritten from the manifest, so the report matches the whole XML and not only the rendered papers
+    all_ghost_authors = [row for number in sorted(manifest, key=int) for row in manifest[number]['ghosts']]
+    ghost_report_path = f'{output_prefix}_ghost_authors.csv'
+    if all_ghost_authors:
+        write_ghost_report(all_ghost_authors, ghost_report_path)
+        print(f"{len(all_ghost_authors)} authors without a profile, see {ghost_report_path}")
+    elif os.path.exists(ghost_report_path):
+        os.remove(ghost_report_path)
+    return len(all_ghost_authors), rendered_count
+
+
+def fetch_tracks(client, tracks, paper_numbers=None, max_workers=MAX_WORKERS, profile_cache=None):
+    """
+    Fetch the notes of several (venue_id, track_name) pairs and the profiles
+    of all their authors.
+
+    The notes of all tracks are fetched concurrently, then the profiles of
+    every author across all tracks are resolved once and shared, so authors
+    appearing in several tracks are only fetched once. Returns the notes per
+    track, the shared profile map and the fetch time per track.
+    """
+    timings = {track: {} for track in tracks}
+
+    def fetch_notes(track):
+        start = time.perf_counter()
+        notes = fetch_track_notes(client, track[0], paper_numbers)
+        timings[track]['fetch'] = time.perf_counter() - start
+        return notes
+
+    track_notes = dict(zip(tracks, ordered_map(fetch_notes, tracks, max_workers)))
+
+    # Resolve the profiles of all authors in one go, instead of one request per author
+    start = time.perf_counter()
+    author_ids = [author_id for notes in track_notes.values() for note in notes
+                  for author_id in note.content.get('authorids', {}).get('value', [])]
+    profile_map = get_author_profiles(client, author_ids, max_workers=max_workers, profile_cache=profile_cache)
+    print(f"Shared profile fetch: {len(set(author_ids))} authors in {time.perf_counter() - start:.2f}s")
+    if profile_cache is not None:
+        print(f"Profile cache: {profile_cache.stats}")
+
+    return track_notes, profile_map, timings
+
+
+def export_tracks(track_notes, profile_map, timings=None, max_workers=MAX_WORKERS,
+                  incremental=False, write_delta=False, affiliation_index=None):
+    """
+    Export every track of `track_notes` with the shared profile map, then
+    print a per-track timing summary.
+    """
+    timings = timings or {track: {'fetch': 0.} for track in track_notes}
+
+    for track, notes in track_notes.items():
+        start = time.perf_counter()
+        timings[track]['ghosts'], timings[track]['rendered'] = export_track(
+            *track, notes, profile_map, max_workers=max_workers, incremental=incremental, write_delta=write_delta,
+            affiliation_index=affiliation_index)
+        timings[track]['export'] = time.perf_counter() - start
+        timings[track]['papers'] = len(notes)
+
+    print(f"\n{'Venue':<40} {'Track':<12} {'Papers':>7} {'Rendered':>9} {'Ghosts':>7} {'Fetch (s)':>10} {'Export (s)':>11}")
+    for (venue_id, track_name), timing in timings.items():
+        print(f"{venue_id:<40} {track_name:<12} {timing['papers']:>7} {timing['rendered']:>9} {timing['ghosts']:>7} "
+              f"{timing['fetch']:>10.2f} {timing['export']:>11.2f}")
+
+
+# ----- Offline snapshot utils -----
+def save_export_snapshot(snapshot_path, track_notes, profile_map):
+    """
+    Save the notes of every exported venue and the author profiles, so the
+    XML can be rendered again later without any network access.
+    """
+    venues = {venue_id: [note_to_json(note) for note in notes] for (venue_id, _), notes in track_notes.items()}
+    profiles = {profile.id: profile_to_json(profile) for profile in profile_map.values()}
+    aliases = {key: profile.id for key, profile in profile_map.items()}
+    save_snapshot(snapshot_path, {'created': time.time(), 'venues': venues, 'profiles': profiles, 'aliases': aliases})
+
+
+def load_export_snapshot(snapshot_path, tracks, paper_numbers=None):
+    snapshot = load_snapshot(snapshot_path)
+    track_notes = {}
+    for venue_id, track_name in tracks:
+        if venue_id not in snapshot['venues']:
+            raise ValueError(f"{venue_id} is not in the snapshot {snapshot_path}")
+        notes = [note_from_json(note) for note in snapshot['venues'][venue_id]]
+        if paper_numbers:
+            notes = [note for note in notes if note.number in paper_numbers]
+        track_notes[(venue_id, track_name)] = notes
+
+    profiles = {profile_id: profile_from_json(profile) for profile_id, profile in snapshot['profiles'].items()}
+    profile_map = {key: profiles[profile_id] for key, profile_id in snapshot['aliases'].items()}
+    created = time.strftime('%Y-%m-%d %H:%M', time.localtime(snapshot['created']))
+    print(f"Loaded snapshot {snapshot_path} from {created}")
+    return track_notes, profile_map
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Export accepted papers of one or more tracks to paperLoad XML.')
+    parser.add_argument('--track', nargs=2, action='append', dest='tracks', metavar=('VENUE_ID', 'TRACK_NAME'),
+                        help='venue id and track name to export, can be repeated (default: VENUE_ID TRACK_NAME)')
+    parser.add_argument('--papers', nargs='*', type=int, default=NEWLY_ID,
+                        help='only export these paper numbers (default: NEWLY_ID)')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help='number of worker threads, 1 for a serial run')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='fetch every profile from OpenReview instead of using the on-disk profile cache')
+    parser.add_argument('--domain-map', default=DOMAIN_MAP_PATH,
+                        help='csv of domain,country[,state_province,city] used to fill affiliation locations')
+    parser.add_argument('--institution-map', default=INSTITUTION_MAP_PATH,
+                        help='csv of institution,country[,state_province,city] used to fill affiliation locations')
+    parser.add_argument('--snapshot',
+                        help='render from this local snapshot instead of OpenReview, no network access')
+    parser.add_argument('--save-snapshot',
+                        help='save the fetched notes and profiles to this snapshot file for later offline exports')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only re-render new or changed papers and splice them into the existing XML')
+    parser.add_argument('--delta', action='store_true',
+                        help='with --incremental, also write the new or changed papers to a delta XML file')
+    args = parser.parse_args()
+    if args.incremental and args.papers:
+        # The manifest and the XML would only keep the selected papers
+        parser.error('--incremental exports every paper of the track, it cannot be combined with --papers')
+    return args
+
+
+def main():
+    args = parse_args()
+    tracks = [tuple(track) for track in args.tracks] if args.tracks else [(VENUE_ID, TRACK_NAME)]
+
+    if args.snapshot:
+        # Offline: everything comes from the snapshot, we do not even log in
+        track_notes, profile_map = load_export_snapshot(args.snapshot, tracks, args.papers)
+        timings = None
+    else:
+        client = get_client()
+        fetch_kwargs = dict(paper_numbers=args.papers, max_workers=args.workers)
+        if args.no_cache:
+            track_notes, profile_map, timings = fetch_tracks(client, tracks, **fetch_kwargs)
+        else:
+            with ProfileCache(PROFILE_CACHE_PATH) as profile_cache:
+                track_notes, profile_map, timings = fetch_tracks(
+                    client, tracks, profile_cache=profile_cache, **fetch_kwargs)
+
+        if args.save_snapshot:
+            save_export_snapshot(args.save_snapshot, track_notes, profile_map)
+            print(f"Snapshot saved to {args.save_snapshot}")
+
+    affiliation_index = AffiliationIndex.load(args.domain_map, args.institution_map)
+    export_tracks(track_notes, profile_map, timings, max_workers=args.workers,
+                  incremental=args.incremental, write_delta=args.delta, affiliation_index=affiliation_index)
+
+    print("XML data export completed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Local lookup index used to fill the location fields of <affiliation> in paperLoad XML files.
+
+Two csv files are read, both optional:
+    - map_domain_country.csv: domain,country[,state_province,city]
+      e.g. `au,Australia` or `uq.edu.au,Australia,Queensland,Brisbane`
+    - map_institution_location.csv: institution,country[,state_province,city]
+      e.g. `The University of Queensland,Australia,Queensland,Brisbane`
+
+Institution names are normalized and looked up in a dict, email/institution
+domains in a suffix trie of the reversed domain labels, so the most specific
+known suffix wins (`cs.uq.edu.au` -> `uq.edu.au` -> `edu.au` -> `au`). Both
+lookups are O(1) in the number of entries.
+
+The index `version` is a hash of every entry added, so incremental exports
+re-render the papers when the maps change.
+"""
+import os
+import re
+import csv
+import hashlib
+
+
+DOMAIN_MAP_PATH = 'map_domain_country.csv'
+INSTITUTION_MAP_PATH = 'map_institution_location.csv'
+
+LOCATION_FIELDS = ['country', 'state_province', 'city']
+
+
+def normalize_institution(name):
+    return re.sub(r'[^a-z0-9]+', ' ', name.lower()).strip()
+
+
+def read_location_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].startswith('#'):
+                continue
+            values = [value.strip() for value in row[1:]]
+            yield row[0].strip(), dict(zip(LOCATION_FIELDS, values))
+
+
+class AffiliationIndex:
+    def __init__(self):
+        self.institutions = {}
+        # Each trie node is a dict of child labels, the location of a node is stored under the None key
+        self.domain_trie = {}
+        self._hash = hashlib.sha1()
+
+    @classmethod
+    def load(cls, domain_map_path=DOMAIN_MAP_PATH, institution_map_path=INSTITUTION_MAP_PATH):
+        index = cls()
+        if domain_map_path and os.path.exists(domain_map_path):
+            for domain, location in read_location_csv(domain_map_path):
+                index.add_domain(domain, location)
+        if institution_map_path and os.path.exists(institution_map_path):
+            for institution, location in read_location_csv(institution_map_path):
+                index.add_institution(institution, location)
+        return index
+
+    @property
+    def version(self):
+        return self._hash.hexdigest()
+
+    def add_domain(self, domain, location):
+        self._hash.update(repr(('domain', domain, location)).encode('utf-8'))
+        node = self.domain_trie
+        for label in reversed(domain.lower().strip('.').split('.')):
+            node = node.setdefault(label, {})
+        node[None] = location
+
+    def add_institution(self, institution, location):
+        self._hash.update(repr(('institution', institution, location)).encode('utf-8'))
+        self.institutions[normalize_institution(institution)] = location
+
+    def lookup_domain(self, domain):
+        # Walk down the reversed labels and keep the deepest location found
+        node, location = self.domain_trie, {}
+        for label in reversed(domain.lower().strip('.').split('.')):
+            node = node.get(label)
+            if node is None:
+                break
+            location = node.get(None, location)
+        return location
+
+    def lookup(self, institution_name='', domains=()):
+        """
+        Location of an affiliation, the institution name is tried first, then
+        each domain in order. Returns a dict with the found LOCATION_FIELDS.
+        """
+        location = self.institutions.get(normalize_institution(institution_name or ''))
+        if location:
+            return location
+        for domain in domains:
+            if domain:
+                location = self.lookup_domain(domain.split('@')[-1])
+                if location:
+                    return location
+        return {}
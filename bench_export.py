@@ -0,0 +1,96 @@
+"""
+Benchmark the serial and the concurrent paperLoad export against a fake OpenReview client.
+
+The fake client answers profile searches after a fixed network latency, so the
+timings show how much of the export is spent waiting on the API. Each run also
+checks that the concurrent output is byte-identical to the serial one.
+
+    python bench_export.py
+"""
+import os
+import time
+import random
+import tempfile
+from types import SimpleNamespace
+from ExportMeta_toXML import (
+    get_author_profiles,
+    render_papers,
+    build_parent_data,
+    write_paperload,
+)
+
+PAPER_COUNTS = [500, 2000, 5000]
+AUTHORS_PER_PAPER = 5
+# Fixed cost of a request plus the cost of each returned profile, in seconds
+REQUEST_LATENCY = 0.25
+PROFILE_LATENCY = 0.0002
+# Batches are kept small so the fake API needs several round trips, as with a real track
+BATCH_SIZE = 200
+WORKERS = 8
+
+
+class FakeClient:
+    def __init__(self, profiles):
+        self.profiles = profiles
+
+    def search_profiles(self, ids=None, confirmedEmails=None):
+        if ids is not None:
+            time.sleep(REQUEST_LATENCY + PROFILE_LATENCY * len(ids))
+            return [self.profiles[i] for i in ids if i in self.profiles]
+        time.sleep(REQUEST_LATENCY + PROFILE_LATENCY * len(confirmedEmails))
+        return {email: self.profiles[email] for email in confirmedEmails if email in self.profiles}
+
+
+def make_venue(num_papers, seed=0):
+    rng = random.Random(seed)
+    num_people = num_papers * AUTHORS_PER_PAPER // 2
+    profiles = {}
+    for p in range(num_people):
+        author_id = f'~Author_{p}1' if p % 10 else f'author{p}@example.org'
+        profiles[author_id] = SimpleNamespace(id=author_id if author_id.startswith('~') else f'~Email_{p}1', content={
+            'names': [{'first': f'First{p}', 'last': f'Last{p}', 'username': author_id}],
+            'history': [{'institution': {'name': f'University {p % 300}'}}],
+            'emails': [f'author{p}@example.org'],
+            'orcid': f'https://orcid.org/0000-0000-0000-{p:04d}',
+        })
+    # A few ghost authors without any profile
+    ids = list(profiles) + [f'~Ghost_{g}1' for g in range(num_papers // 100)]
+
+    notes = []
+    for number in rng.sample(range(1, num_papers * 2), num_papers):
+        authorids = rng.sample(ids, AUTHORS_PER_PAPER)
+        notes.append(SimpleNamespace(number=number, content={
+            'title': {'value': f'Paper {number}'},
+            'authorids': {'value': authorids},
+            'authors': {'value': [author_id.strip('~') for author_id in authorids]},
+        }))
+    return FakeClient(profiles), notes
+
+
+def run_export(client, notes, xml_file_path, max_workers):
+    start = time.perf_counter()
+    author_ids = [author_id for note in notes for author_id in note.content['authorids']['value']]
+    profile_map = get_author_profiles(client, author_ids, batch_size=BATCH_SIZE, max_workers=max_workers)
+    ghost_authors = []
+    papers = render_papers(notes, profile_map, ghost_authors, max_workers=max_workers)
+    write_paperload(xml_file_path, build_parent_data('bench.org/Bench/2024/Conference'), papers)
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'papers':>8} {'serial (s)':>12} {'workers=' + str(WORKERS) + ' (s)':>16} {'speedup':>8} {'identical':>10}")
+        for num_papers in PAPER_COUNTS:
+            client, notes = make_venue(num_papers)
+            serial_path = os.path.join(tmp_dir, 'serial.xml')
+            concurrent_path = os.path.join(tmp_dir, 'concurrent.xml')
+            serial_time = run_export(client, notes, serial_path, max_workers=1)
+            concurrent_time = run_export(client, notes, concurrent_path, max_workers=WORKERS)
+            with open(serial_path, 'rb') as f1, open(concurrent_path, 'rb') as f2:
+                identical = f1.read() == f2.read()
+            print(f"{num_papers:>8} {serial_time:>12.2f} {concurrent_time:>16.2f} "
+                  f"{serial_time / concurrent_time:>7.1f}x {str(identical):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Report what changed between two paperLoad XML uploads, e.g. for Sheridan.
+
+Both files are streamed with iterparse: papers are matched by
+`event_tracking_number`, authors by their `sequence_no`, and every added,
+removed or changed paper and field is reported. Files written by
+ExportMeta_toXML.py are ordered by event_tracking_number, which lets the two
+streams be merged with constant memory. Older, unordered files still work,
+but then the papers of the old file are indexed in memory.
+
+    python diff_paperLoad.py OLD_paperLoad.xml NEW_paperLoad.xml --output changes.csv
+"""
+import csv
+import sys
+import argparse
+import xml.etree.ElementTree as ET
+
+
+class UnorderedPapersError(Exception):
+    pass
+
+
+# Numbers sort numerically, anything else (e.g. 'testpaper1') after them
+def paper_key(number):
+    return (0, int(number), '') if number.isdigit() else (1, 0, number)
+
+
+def flatten_paper(paper):
+    """
+    Flatten a <paper> element into {field path: text}, e.g.
+    'paper_title', 'author[2].last_name', 'author[2].affiliation[1].institution'.
+    """
+    fields = {}
+    for child in paper:
+        if child.tag != 'authors':
+            fields[child.tag] = (child.text or '').strip()
+            continue
+        for author in child:
+            prefix = f"author[{(author.findtext('sequence_no') or '').strip()}]"
+            for author_field in author:
+                if author_field.tag != 'affiliations':
+                    fields[f'{prefix}.{author_field.tag}'] = (author_field.text or '').strip()
+                    continue
+                for affiliation in author_field:
+                    aff_prefix = f"{prefix}.affiliation[{(affiliation.findtext('sequence_no') or '').strip()}]"
+                    for aff_field in affiliation:
+                        fields[f'{aff_prefix}.{aff_field.tag}'] = (aff_field.text or '').strip()
+    return fields
+
+
+# Stream the papers of a file as (event_tracking_number, fields)
+def iter_papers(xml_file_path, check_order=True):
+    context = ET.iterparse(xml_file_path, events=('start', 'end'))
+    _, root = next(context)
+    previous = None
+    for event, elem in context:
+        if event == 'end' and elem.tag == 'paper':
+            number = (elem.findtext('event_tracking_number') or '').strip()
+            if check_order and previous is not None and paper_key(number) <= paper_key(previous):
+                raise UnorderedPapersError(f'{xml_file_path} is not ordered by event_tracking_number')
+            previous = number
+            yield number, flatten_paper(elem)
+            root.clear()
+
+
+def diff_fields(number, old_fields, new_fields):
+    for field in sorted(old_fields.keys() | new_fields.keys()):
+        old_value, new_value = old_fields.get(field), new_fields.get(field)
+        if old_value != new_value:
+            yield ('changed', number, field, old_value, new_value)
+
+
+def diff_sorted(old_path, new_path):
+    """
+    Merge-join two files ordered by event_tracking_number, constant memory.
+    """
+    old_papers, new_papers = iter_papers(old_path), iter_papers(new_path)
+    old, new = next(old_papers, None), next(new_papers, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and paper_key(old[0]) < paper_key(new[0])):
+            yield ('removed', old[0], '', '', '')
+            old = next(old_papers, None)
+        elif old is None or paper_key(new[0]) < paper_key(old[0]):
+            yield ('added', new[0], '', '', '')
+            new = next(new_papers, None)
+        else:
+            yield from diff_fields(old[0], old[1], new[1])
+            old, new = next(old_papers, None), next(new_papers, None)
+
+
+def diff_unsorted(old_path, new_path):
+    """
+    Fallback for unordered files, the old file is indexed in memory.
+    """
+    old_papers = dict(iter_papers(old_path, check_order=False))
+    for number, new_fields in iter_papers(new_path, check_order=False):
+        if number not in old_papers:
+            yield ('added', number, '', '', '')
+        else:
+            yield from diff_fields(number, old_papers.pop(number), new_fields)
+    for number in old_papers:
+        yield ('removed', number, '', '', '')
+
+
+# Cheap streaming pass that only reads the event tracking numbers
+def is_ordered(xml_file_path):
+    context = ET.iterparse(xml_file_path, events=('start', 'end'))
+    _, root = next(context)
+    previous = None
+    for event, elem in context:
+        if event == 'end' and elem.tag == 'event_tracking_number':
+            number = (elem.text or '').strip()
+            if previous is not None and paper_key(number) <= paper_key(previous):
+                return False
+            previous = number
+        elif event == 'end' and elem.tag == 'paper':
+            root.clear()
+    return True
+
+
+def diff_paperload(old_path, new_path):
+    """
+    Yield (change, event_tracking_number, field, old value, new value) rows,
+    change being one of 'added', 'removed' or 'changed'.
+    """
+    if is_ordered(old_path) and is_ordered(new_path):
+        yield from diff_sorted(old_path, new_path)
+    else:
+        print("Papers are not ordered by event_tracking_number, falling back to the in-memory diff",
+              file=sys.stderr)
+        yield from diff_unsorted(old_path, new_path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Diff two paperLoad XML files.')
+    parser.add_argument('old', help='previously uploaded paperLoad XML')
+    parser.add_argument('new', help='new paperLoad XML')
+    parser.add_argument('--output', help='write the changes to this csv file instead of the console')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    counts = {'added': 0, 'removed': 0, 'changed': 0}
+    # Rows of a changed paper are consecutive, so counting the papers needs no set
+    changed_papers, last_changed = 0, None
+
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(['change', 'event_tracking_number', 'field', 'old', 'new'])
+        for row in diff_paperload(args.old, args.new):
+            writer.writerow(row)
+            counts[row[0]] += 1
+            if row[0] == 'changed' and row[1] != last_changed:
+                changed_papers, last_changed = changed_papers + 1, row[1]
+    finally:
+        if args.output:
+            out.close()
+
+    print(f"{counts['added']} papers added, {counts['removed']} removed, "
+          f"{changed_papers} changed ({counts['changed']} fields)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
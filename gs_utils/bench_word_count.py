@@ -0,0 +1,103 @@
+"""
+Benchmark review word counting over a synthetic corpus of reviews.
+
+Compares the former per-call regex and split() counters with the shared
+tokenizer, and the persistent (reply id, mdate) memo when it is cold, warm,
+and warm with a fraction of the reviews edited since the previous run.
+
+    python bench_word_count.py
+"""
+import os
+import re
+import time
+import random
+import tempfile
+from src.word_count import WordCountMemo, content_word_count
+
+NUM_REVIEWS = 30000
+# Fraction of the reviews edited between two runs, e.g. during the discussion period
+EDITED_FRACTION = 0.05
+REVIEW_FIELDS = ['summary', 'strengths', 'weaknesses', 'questions', 'limitations']
+WORDS_PER_FIELD = (30, 300)
+VOCABULARY = [
+    'the', 'paper', 'proposes', 'a', 'novel', 'method', 'for', 'multimodal', 'retrieval', 'results',
+    'are', 'convincing', 'but', 'ablation', 'is', 'missing', 'state-of-the-art', 'baselines', 'e.g.', 'Fig.',
+    'Table', '3', 'performance', 'improves', 'by', '2.5%', 'authors', 'should', 'clarify', "don't",
+]
+
+
+def make_reviews(num_reviews, seed=0):
+    rng = random.Random(seed)
+    reviews = []
+    for i in range(num_reviews):
+        content = {
+            field: {'value': ' '.join(rng.choices(VOCABULARY, k=rng.randint(*WORDS_PER_FIELD)))}
+            for field in REVIEW_FIELDS
+        }
+        content['rating'] = {'value': rng.randint(1, 6)}
+        content['confidence'] = {'value': rng.randint(1, 5)}
+        reviews.append({'id': f'review{i}', 'mdate': 1000 + i, 'content': content})
+    return reviews
+
+
+def edit_reviews(reviews, fraction, seed=1):
+    rng = random.Random(seed)
+    edited = [dict(review) for review in reviews]
+    for i in rng.sample(range(len(edited)), int(len(edited) * fraction)):
+        content = dict(edited[i]['content'])
+        content['summary'] = {'value': content['summary']['value'] + ' updated after the rebuttal'}
+        edited[i] = {**edited[i], 'mdate': edited[i]['mdate'] + 10 ** 6, 'content': content}
+    return edited
+
+
+# ----- Former counters, kept here for comparison -----
+def regex_count(content):
+    length = 0
+    for text in content.values():
+        if 'value' not in text:
+            continue
+        if isinstance(text['value'], str):
+            length += len(re.findall(r'\b\w+\b', text['value']))
+    return length
+
+
+def split_count(content):
+    return sum(len(v['value'].split()) for v in content.values() if 'value' in v and type(v['value']) == str)
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    rtn = fn()
+    print(f"{label:<40} {time.perf_counter() - start:8.3f}s")
+    return rtn
+
+
+def memo_run(path, reviews):
+    with WordCountMemo.load(path) as memo:
+        counts = [memo.count(review) for review in reviews]
+    return counts, memo.stats
+
+
+def main():
+    reviews = make_reviews(NUM_REVIEWS)
+    edited = edit_reviews(reviews, EDITED_FRACTION)
+    print(f"{NUM_REVIEWS} reviews, {int(NUM_REVIEWS * EDITED_FRACTION)} edited between runs")
+
+    expected = timed("former regex counter", lambda: [regex_count(r['content']) for r in reviews])
+    timed("former split() counter", lambda: [split_count(r['content']) for r in reviews])
+    counts = timed("shared tokenizer", lambda: [content_word_count(r['content']) for r in reviews])
+    assert counts == expected
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'word_counts.json.gz')
+        counts, _ = timed("memo, cold (count + save)", lambda: memo_run(path, reviews))
+        assert counts == expected
+        counts, stats = timed("memo, warm (load, nothing edited)", lambda: memo_run(path, reviews))
+        assert counts == expected and stats['misses'] == 0
+        counts, stats = timed("memo, warm (load, edits + save)", lambda: memo_run(path, edited))
+        assert counts == [content_word_count(r['content']) for r in edited]
+        print(f"memo stats after the edits: {stats}")
+
+
+if __name__ == "__main__":
+    main()
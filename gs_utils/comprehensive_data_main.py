@@ -12,12 +12,11 @@ The script generates two output files in .cache/data/:
 """
 
 import os
-from functools import partial
 from datetime import datetime, timedelta
-import multiprocessing as mp
 import openreview
 import pandas as pd
 from tqdm import tqdm
+from tqdm.asyncio import tqdm_asyncio
 from rich import print
 import pandas as pd
 from src.utils import (
@@ -25,6 +24,9 @@ from src.utils import (
     get_client,
 )
 from src.constants import CACHE_DIR
+from src.cycle_snapshot import CycleSnapshot
+from src.word_count import WordCountMemo, content_word_count
+from src.async_client import run_async
 
 
 # Helper functions that will be used later
@@ -34,15 +36,7 @@ def convert_time(timestamp_ms):
     return date_time.strftime("%Y-%m-%d")
 
 
-def get_word_count(content_dict):
-    word_count = 0
-    for k, v in content_dict.items():
-        if 'value' in v and type(v['value']) == str:
-            word_count += len(v['value'].split())
-    return word_count
-
-
-def process_review(client, review):
+async def process_review(async_client, review):
     # get id
     signature = review.signatures[0]
     sub_num, rev_id = signature.split('/')[-2:]
@@ -51,7 +45,7 @@ def process_review(client, review):
     row_id = tuple([sub_num, rev_id])
     
     # get all edits
-    edits = client.get_note_edits(review.id)
+    edits = await async_client.get_note_edits(review.id)
     edits = [elem for elem in edits if signature in elem.signatures]
     edits = sorted(edits, key=lambda x: x.cdate, reverse=False)
 
@@ -61,32 +55,44 @@ def process_review(client, review):
         # print(edit['note'].content)
         content_dict.update(edit.note.content)
         date = convert_time(edit.cdate)
-        word_count = get_word_count(content_dict)
+        word_count = content_word_count(content_dict)
         date2wordcount[date] = word_count
     
     return {row_id: date2wordcount}
 
 
+# The edits of all reviews are requested concurrently from one event loop
+async def process_reviews(async_client, reviews):
+    return await tqdm_asyncio.gather(*[process_review(async_client, review) for review in reviews])
+
+
 def main():
     load_credentials()
     client = get_client()
 
-    # Define the conference ID and the accepted papers invitation ID
+    # Define the conference ID, the submissions and their replies are indexed by kind once
     venue_id = os.environ['OPENREVIEW_VENUE_ID']
-    venue_group = client.get_group(venue_id)
-    submission_name = venue_group.content['submission_name']['value']
-    submissions = client.get_all_notes(invitation=f'{venue_id}/-/{submission_name}', details='replies')
+    snapshot = CycleSnapshot.fetch(client, venue_id)
+    submissions = snapshot.submissions
+    reply_index = snapshot.reply_index
+
+    # Word counts are shared with gs_main.py, only new or edited replies are tokenized again
+    memo = WordCountMemo.load()
 
     outputs = []
     for s in tqdm(submissions):
     # for s in tqdm(submissions[:1]):  # dbg
         # author_attrs
-        is_withdrawn = False
         primary_area = s.content['primary_subject_area']['value']
         primary_area = primary_area.split('[')[-1].split(']')[0]
+        is_withdrawn = reply_index.has(s.id, 'withdrawals')
 
         # pc_attrs
         decision = None
+        for reply in reply_index.get(s.id, 'decisions'):
+            if 'decision' in reply['content']:
+                assert decision is None
+                decision = reply['content']['decision']['value']
 
         # rvw_attrs
         comment_word_count = []
@@ -102,72 +108,33 @@ def main():
         meta_decision = []
         meta_confidence = []
 
-        for reply in s.details['replies']:
-            signature = reply['signatures'][0].split("/")[-1]
-            if signature.startswith("Program_Chairs"):
-                if 'decision' in reply['content']:
-                    assert decision is None
-                    decision = reply['content']['decision']['value']
-
-            elif signature.startswith("Reviewer_"):
-                is_review = f'{venue_id}/Submission{s.number}/-/Official_Review' in reply['invitations']
-                if is_review:
-                    # Officisla reviews - just reviews...
-                    word_count = 0
-                    for k, v in reply['content'].items():
-                        if 'value' in v and type(v['value']) == str:
-                            word_count += len(v['value'].split())
-                    word_counts.append(word_count)
-
-                    if 'suitability' in reply['content']:
-                        suitability.append(reply['content']['suitability']['value'])
-                    else:
-                        suitability.append(4)  # <-- let's give them a decent score here...
-                    init_ratings.append(reply['content']['rating']['value'])
-                    if 'final_rating' in reply['content'] and 'value' in reply['content']['final_rating']:
-                        final_ratings.append(reply['content']['final_rating']['value'])
-                        raw_final_ratings.append(reply['content']['final_rating']['value'])
-                    else:
-                        final_ratings.append(reply['content']['rating']['value'])
-                        raw_final_ratings.append(0)
-                    confidence.append(reply['content']['confidence']['value'])
-                else:
-                    # Official comments - e.g. rebuttals
-                    word_count = 0
-                    for k, v in reply['content'].items():
-                        if 'value' in v and type(v['value']) == str:
-                            word_count += len(v['value'].split())
-                    comment_word_count.append(word_count)
-
-            elif signature.startswith("Area_Chair_") or signature.startswith("Senior_Area_Chair"):
-                # Meta_reviews
-                is_metareview = f'{venue_id}/Submission{s.number}/-/Meta_Review' in reply['invitations']
-                if is_metareview:
-                    word_count = 0
-                    for k, v in reply['content'].items():
-                        if 'value' in v and type(v['value']) == str:
-                            word_count += len(v['value'].split())
-                    meta_word_counts.append(word_count)
-
-                    meta_decision.append(reply['content']['recommendation']['value'])
-                    meta_confidence.append(reply['content']['confidence']['value'])
-
-                else:
-                    # Official comments - e.g., dicussions?
-                    pass
-
-            elif signature.startswith("Authors"):
-                if f'{venue_id}/Submission{s.number}/-/Withdrawal' in reply['invitations']:
-                    is_withdrawn = True
-                elif f'{venue_id}/Submission{s.number}/-/Rebuttal' in reply['invitations']:
-                    # Don't care about rebuttal
-                    pass
-                else:
-                    # Should not print out anything here, actually...
-                    print(reply)
+        # Officisla reviews - just reviews...
+        for reply in reply_index.reviews(s.id):
+            word_counts.append(memo.count(reply))
 
+            if 'suitability' in reply['content']:
+                suitability.append(reply['content']['suitability']['value'])
             else:
-                raise NotImplementedError(f"Unknown signature: {signature}")
+                suitability.append(4)  # <-- let's give them a decent score here...
+            init_ratings.append(reply['content']['rating']['value'])
+            if 'final_rating' in reply['content'] and 'value' in reply['content']['final_rating']:
+                final_ratings.append(reply['content']['final_rating']['value'])
+                raw_final_ratings.append(reply['content']['final_rating']['value'])
+            else:
+                final_ratings.append(reply['content']['rating']['value'])
+                raw_final_ratings.append(0)
+            confidence.append(reply['content']['confidence']['value'])
+
+        # Official comments of the reviewers - e.g. rebuttals
+        for reply in reply_index.get(s.id, 'comments'):
+            if reply['signatures'][0].split("/")[-1].startswith("Reviewer_"):
+                comment_word_count.append(memo.count(reply))
+
+        # Meta_reviews
+        for reply in reply_index.meta_reviews(s.id):
+            meta_word_counts.append(memo.count(reply))
+            meta_decision.append(reply['content']['recommendation']['value'])
+            meta_confidence.append(reply['content']['confidence']['value'])
 
         # Finally, if there is no decision, consider as rejected
         if decision is None:
@@ -193,25 +160,24 @@ def main():
                 "meta_review_confidence": ",".join(list(map(str, meta_confidence))),
             })
 
+    memo.save()
+
     df = pd.DataFrame(outputs)
     df.to_excel(os.path.join(CACHE_DIR, 'data', 'valid_paper_all_detaills.xlsx'), index=False)
 
-    review_name = venue_group.content['review_name']['value']
-    reviews=[
+    reviews = [
         openreview.api.Note.from_json(reply)
         for s in submissions
-        for reply in s.details['replies']
-        if f'{venue_id}/{submission_name}{s.number}/-/{review_name}' in reply['invitations']
+        for reply in reply_index.reviews(s.id)
     ]
 
-    with mp.Pool(16) as pool:
-        outputs = list(tqdm(pool.imap(partial(process_review, client), reviews), total=len(reviews)))
+    outputs = run_async(client, process_reviews, reviews)
     
     # Sequential version just for debugging
     # outputs = []
     # for i, review in enumerate(tqdm(reviews)):
     #     print(i, review.id)
-    #     outputs.append(process_review(client, review))
+    #     outputs.append(run_async(client, process_review, review))
 
     outputs = {k: v for elem in outputs for k, v in elem.items()}
     # sort by original key order, original means the one in the reviews
@@ -15,7 +15,16 @@ from src.utils import (
     get_client,
     authenticate_gspread,
 )
-from src.constants import SCRIPT_WAIT_PERIOD
+from src.cycle_snapshot import CycleSnapshot
+from src.submission_store import SubmissionStore
+from src.constants import (
+    SCRIPT_WAIT_PERIOD,
+    PERSIST_CYCLE_SNAPSHOT,
+    INCREMENTAL_SYNC,
+    ACTIVE_SUBMISSIONS_ONLY,
+    TARGETED_REPLY_FETCH,
+    CYCLE_REPLY_KINDS,
+)
 
 
 # Load logging configuration
@@ -39,25 +48,41 @@ def main():
         build_service=True
     )
 
+    venue_id = os.environ["OPENREVIEW_VENUE_ID"]
+    store = SubmissionStore.load() if INCREMENTAL_SYNC else None
+    # only the replies read by the stages are fetched
+    reply_kinds = CYCLE_REPLY_KINDS if TARGETED_REPLY_FETCH else None
+
+    snapshot = None
     while True:
+        # fetch the venue group, submissions and replies once, every stage of the cycle reads them
+        if snapshot is None and PERSIST_CYCLE_SNAPSHOT:
+            # after a restart, reuse the snapshot saved by the previous process if it is recent enough
+            snapshot = CycleSnapshot.load_or_fetch(client, venue_id, store, reply_kinds=reply_kinds,
+                                                   active_only=ACTIVE_SUBMISSIONS_ONLY)
+        else:
+            snapshot = CycleSnapshot.fetch(client, venue_id, store, reply_kinds, ACTIVE_SUBMISSIONS_ONLY)
+            if PERSIST_CYCLE_SNAPSHOT:
+                snapshot.save()
+
         # fetch the conference metadata first (PC -> SAC -> AC -> Reviewer assignments)
-        fetch_submission_metadata(client)
+        fetch_submission_metadata(client, snapshot)
         wait_step()
 
         # fetch the review word count data
-        fetch_review_wordcount(client)
+        fetch_review_wordcount(client, snapshot)
         wait_step()
 
         # fetch the review rating data
-        fetch_review_rating(client)
+        fetch_review_rating(client, snapshot)
         wait_step()
 
         # fetch the missing metareview of the AC's, for PC's analysis and review
-        fetch_missing_metareview(client)
+        fetch_missing_metareview(client, snapshot)
         wait_step()
 
         # fetch the AC's recommendation outliers, for PC's analysis and review
-        fetch_recommendation_outliers(client)
+        fetch_recommendation_outliers(client, snapshot)
         wait_step()
 
         # upload the area chair data to Google Sheets
@@ -66,6 +91,8 @@ def main():
 
         # upload the senior area chair data to Google Sheets
         gs_sac_upload(gs_client, service)
+        logger.info(f"Request cache hits and misses of the cycle: {client.request_cache.pop_stats()}")
+        logger.info(f"OpenReview concurrency of the cycle: {client.limiter.pop_stats()}")
         wait_step()
 
 
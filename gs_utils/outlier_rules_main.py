@@ -0,0 +1,30 @@
+"""
+Re-evaluate the recommendation outlier rules without crawling OpenReview.
+
+The paper table cached by the last `fetch_recommendation_outliers` run (gs_main.py)
+is read back and the rules of OUTLIER_RULES_PATH are applied to it, so thresholds
+and rules can be tuned and checked in seconds:
+
+    python outlier_rules_main.py
+    python outlier_rules_main.py --rules my_rules.json --output my_outliers.csv
+"""
+import argparse
+from src.constants import OUTLIER_RULES_PATH
+from src.outlier_rules import load_paper_table, write_outlier_report, OUTLIER_REPORT_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-evaluate the recommendation outlier rules offline.')
+    parser.add_argument('--rules', default=OUTLIER_RULES_PATH, help='rules file to apply')
+    parser.add_argument('--output', default=OUTLIER_REPORT_PATH, help='where to write the outlier report')
+    args = parser.parse_args()
+
+    table = load_paper_table()
+    out = write_outlier_report(table, args.rules, args.output)
+    print(f"{len(out)} outliers in {len(table)} papers, report saved to {args.output}")
+    for reason, count in out['Reason'].value_counts().items():
+        print(f"{count:>6}  {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import os
+import json
+import pickle
+import sqlite3
+import hashlib
+import pandas as pd
+from src.constants import CACHE_DIR
+
+
+AC_DATA_STORE_PATH = os.path.join(CACHE_DIR, 'data', 'ac_data.sqlite')
+
+# Per-AC datasets written by the fetch stages and read by gs_ac_upload
+WORD_COUNT = 'word_count'
+RATING = 'rating'
+REVIEWER_INFO = 'reviewer_info'
+PAPER_PROGRESS = 'paper'
+REVIEW_PROGRESS = 'review'
+# Datasets shown in the progress rows and in the AC sheets, reviewer info is not uploaded
+# The global progress is tracked on its own (see global_progress_dirty), not per AC
+PROGRESS_DATASETS = {PAPER_PROGRESS, REVIEW_PROGRESS}
+SHEET_DATASETS = {WORD_COUNT, RATING} | PROGRESS_DATASETS
+
+
+# Content hash of a table: column names, dtypes and values, not the index
+def frame_hash(df):
+    h = hashlib.sha1()
+    h.update(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+# ----- Per-AC data store -----
+class ACDataStore:
+    """
+    SQLite database holding the per-AC tables of every cycle, partitioned by
+    (dataset, AC): one row per AC and dataset with the pickled DataFrame, plus
+    the per-AC and global progress counters.
+
+    Tables are compared by content hash and only the changed ones are
+    rewritten. Every change is recorded in the dirty manifest (`dirty_acs`),
+    which the uploaders use to only touch the sheets whose data changed. A
+    dataset is updated in a single transaction, so the uploader never reads a
+    half-written cycle, and ACs that disappeared are dropped.
+    """
+
+    def __init__(self, path=AC_DATA_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS frames (
+                dataset TEXT,
+                ac_id TEXT,
+                data BLOB,
+                PRIMARY KEY (dataset, ac_id)
+            );
+            CREATE TABLE IF NOT EXISTS frame_hashes (
+                dataset TEXT,
+                ac_id TEXT,
+                hash TEXT,
+                PRIMARY KEY (dataset, ac_id)
+            );
+            CREATE TABLE IF NOT EXISTS progress (
+                kind TEXT,
+                ac_id TEXT,
+                current INTEGER,
+                total INTEGER,
+                PRIMARY KEY (kind, ac_id)
+            );
+            CREATE TABLE IF NOT EXISTS global_progress (
+                kind TEXT PRIMARY KEY,
+                current INTEGER,
+                total INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS dirty_acs (
+                ac_id TEXT,
+                dataset TEXT,
+                PRIMARY KEY (ac_id, dataset)
+            );
+            CREATE TABLE IF NOT EXISTS dirty_sacs (
+                sac_id TEXT,
+                ac_id TEXT,
+                PRIMARY KEY (sac_id, ac_id)
+            );
+            CREATE TABLE IF NOT EXISTS dirty_global (
+                kind TEXT PRIMARY KEY
+            );
+        """)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _mark_dirty(self, dataset, ac_ids):
+        self._conn.executemany(
+            'INSERT OR IGNORE INTO dirty_acs (ac_id, dataset) VALUES (?, ?)',
+            [(ac_id, dataset) for ac_id in ac_ids]
+        )
+
+    # ----- Writers, used by the fetch stages -----
+    def write_frames(self, dataset, ac2frame):
+        """
+        Replace the tables of a dataset, only the ACs whose table changed are
+        rewritten and marked dirty. Returns the list of changed ACs.
+        """
+        hashes = dict(self._conn.execute('SELECT ac_id, hash FROM frame_hashes WHERE dataset = ?', (dataset,)).fetchall())
+        new_hashes = {ac_id: frame_hash(df) for ac_id, df in ac2frame.items()}
+        changed = [ac_id for ac_id, h in new_hashes.items() if hashes.get(ac_id) != h]
+        removed = [ac_id for ac_id in hashes if ac_id not in ac2frame]
+
+        with self._conn:
+            self._conn.executemany('DELETE FROM frames WHERE dataset = ? AND ac_id = ?',
+                                   [(dataset, ac_id) for ac_id in changed + removed])
+            self._conn.executemany('DELETE FROM frame_hashes WHERE dataset = ? AND ac_id = ?',
+                                   [(dataset, ac_id) for ac_id in removed])
+            self._conn.executemany(
+                'INSERT INTO frames (dataset, ac_id, data) VALUES (?, ?, ?)',
+                [(dataset, ac_id, pickle.dumps(ac2frame[ac_id], protocol=pickle.HIGHEST_PROTOCOL)) for ac_id in changed]
+            )
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO frame_hashes (dataset, ac_id, hash) VALUES (?, ?, ?)',
+                [(dataset, ac_id, new_hashes[ac_id]) for ac_id in changed]
+            )
+            self._mark_dirty(dataset, changed)
+        return changed
+
+    def write_progress(self, kind, ac2progress, global_progress):
+        """
+        Update the progress of every AC and the global progress. An AC is
+        marked dirty when its own progress changed. A global progress change
+        only sets the global dirty flag, so it does not make every AC sheet
+        look changed. Returns the list of ACs whose own progress changed.
+        """
+        old = {
+            ac_id: {'current': current, 'total': total}
+            for ac_id, current, total in self._conn.execute(
+                'SELECT ac_id, current, total FROM progress WHERE kind = ?', (kind,)
+            ).fetchall()
+        }
+        changed = [ac_id for ac_id, progress in ac2progress.items() if old.get(ac_id) != progress]
+        global_changed = self.read_global_progress(kind) != global_progress
+
+        with self._conn:
+            self._conn.execute('DELETE FROM progress WHERE kind = ?', (kind,))
+            self._conn.executemany(
+                'INSERT INTO progress (kind, ac_id, current, total) VALUES (?, ?, ?, ?)',
+                [(kind, ac_id, progress['current'], progress['total']) for ac_id, progress in ac2progress.items()]
+            )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO global_progress (kind, current, total) VALUES (?, ?, ?)',
+                (kind, global_progress['current'], global_progress['total'])
+            )
+            self._mark_dirty(kind, changed)
+            if global_changed:
+                self._conn.execute('INSERT OR IGNORE INTO dirty_global (kind) VALUES (?)', (kind,))
+        return changed
+
+    # ----- Readers, used by the uploaders -----
+    def ac_ids(self, dataset):
+        # Sorted, as the tables of changed ACs are rewritten in place
+        rows = self._conn.execute('SELECT ac_id FROM frames WHERE dataset = ? ORDER BY ac_id', (dataset,)).fetchall()
+        return [ac_id for ac_id, in rows]
+
+    def read_frame(self, dataset, ac_id):
+        row = self._conn.execute(
+            'SELECT data FROM frames WHERE dataset = ? AND ac_id = ?', (dataset, ac_id)
+        ).fetchone()
+        return None if row is None else pickle.loads(row[0])
+
+    def read_progress(self, kind, ac_id):
+        row = self._conn.execute(
+            'SELECT current, total FROM progress WHERE kind = ? AND ac_id = ?', (kind, ac_id)
+        ).fetchone()
+        return None if row is None else {'current': row[0], 'total': row[1]}
+
+    def read_global_progress(self, kind):
+        row = self._conn.execute('SELECT current, total FROM global_progress WHERE kind = ?', (kind,)).fetchone()
+        return None if row is None else {'current': row[0], 'total': row[1]}
+
+    # ----- Dirty manifest -----
+    def dirty_acs(self):
+        """{AC: set of datasets} of the ACs changed since their last upload."""
+        rtn = {}
+        for ac_id, dataset in self._conn.execute('SELECT ac_id, dataset FROM dirty_acs').fetchall():
+            rtn.setdefault(ac_id, set()).add(dataset)
+        return rtn
+
+    def dirty_sacs(self):
+        """{SAC: set of ACs} whose AC sheets were uploaded since the SAC's last upload."""
+        rtn = {}
+        for sac_id, ac_id in self._conn.execute('SELECT sac_id, ac_id FROM dirty_sacs').fetchall():
+            rtn.setdefault(sac_id, set()).add(ac_id)
+        return rtn
+
+    def mark_ac_uploaded(self, ac_id, sac_ids):
+        # The AC's sheets are up to date, the SACs now have to copy them
+        with self._conn:
+            self._conn.execute('DELETE FROM dirty_acs WHERE ac_id = ?', (ac_id,))
+            self._conn.executemany('INSERT OR IGNORE INTO dirty_sacs (sac_id, ac_id) VALUES (?, ?)',
+                                   [(sac_id, ac_id) for sac_id in sac_ids])
+
+    def global_progress_dirty(self):
+        """Whether the global progress changed since it was last written to the AC sheets."""
+        return self._conn.execute('SELECT 1 FROM dirty_global LIMIT 1').fetchone() is not None
+
+    def mark_global_progress_uploaded(self):
+        with self._conn:
+            self._conn.execute('DELETE FROM dirty_global')
+
+    def mark_sac_uploaded(self, sac_id):
+        with self._conn:
+            self._conn.execute('DELETE FROM dirty_sacs WHERE sac_id = ?', (sac_id,))
@@ -0,0 +1,108 @@
+import os
+import time
+import asyncio
+import logging
+from src.constants import CACHE_DIR, INACTIVE_IDS_MAX_AGE
+from src.venue_snapshot import save_snapshot, load_snapshot
+
+
+INACTIVE_IDS_PATH = os.path.join(CACHE_DIR, 'inactive_submissions.json.gz')
+
+logger = logging.getLogger(__name__)
+
+
+# Query parameters of a submission query, without details when `details` is None
+def note_query(invitation, details=None, **params):
+    params['invitation'] = invitation
+    if details is not None:
+        params['details'] = details
+    return params
+
+
+# ----- Submission venue ids -----
+# The venueid of the active (under review, accepted, rejected) and inactive (withdrawn, desk rejected) submissions
+def submission_venue_ids(venue_id, venue_grp):
+    submission_name = venue_grp.content['submission_name']['value']
+
+    def content_value(key, default):
+        return venue_grp.content.get(key, {}).get('value', default)
+
+    active = [
+        content_value('submission_venue_id', f'{venue_id}/{submission_name}'),
+        venue_id,
+        content_value('rejected_venue_id', f'{venue_id}/Rejected_{submission_name}'),
+    ]
+    inactive = [
+        content_value('withdrawn_venue_id', f'{venue_id}/Withdrawn_{submission_name}'),
+        content_value('desk_rejected_venue_id', f'{venue_id}/Desk_Rejected_{submission_name}'),
+    ]
+    return active, inactive
+
+
+# ----- Inactive submission ids -----
+class InactiveSubmissionIds:
+    """
+    Ids of the withdrawn and desk rejected submissions of a venue, saved
+    between runs. They are only refetched (without replies) when older than
+    `max_age` seconds, or when the submission counts show that a submission
+    was withdrawn or desk rejected since.
+    """
+
+    def __init__(self, path=INACTIVE_IDS_PATH, max_age=INACTIVE_IDS_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.venue_id = None
+        self.fetched_at = 0
+        self.ids = set()
+
+    @classmethod
+    def load(cls, path=INACTIVE_IDS_PATH, max_age=INACTIVE_IDS_MAX_AGE):
+        inactive = cls(path, max_age)
+        if os.path.exists(path):
+            data = load_snapshot(path)
+            inactive.venue_id = data['venue_id']
+            inactive.fetched_at = data['fetched_at']
+            inactive.ids = set(data['ids'])
+        return inactive
+
+    def save(self):
+        save_snapshot(self.path, {'venue_id': self.venue_id, 'fetched_at': self.fetched_at, 'ids': sorted(self.ids)})
+
+    def is_fresh(self, venue_id):
+        return self.venue_id == venue_id and time.time() - self.fetched_at <= self.max_age
+
+    async def refresh(self, async_client, venue_id, invitation, inactive_venue_ids):
+        notes = await asyncio.gather(*[
+            async_client.get_all_notes(**{'invitation': invitation, 'content.venueid': venueid, 'select': 'id'})
+            for venueid in inactive_venue_ids
+        ])
+        self.venue_id = venue_id
+        self.fetched_at = time.time()
+        self.ids = {note.id for venue_notes in notes for note in venue_notes}
+        self.save()
+
+
+# Only the active submissions, with their replies by default, are downloaded; the venueid filter is applied server-side
+async def fetch_active_submissions(async_client, venue_id, venue_grp, invitation, inactive, details='replies'):
+    active_venue_ids, inactive_venue_ids = submission_venue_ids(venue_id, venue_grp)
+    if not inactive.is_fresh(venue_id):
+        await inactive.refresh(async_client, venue_id, invitation, inactive_venue_ids)
+
+    total, *active = await asyncio.gather(
+        async_client.get_note_count(invitation=invitation),
+        *[async_client.get_all_notes(**note_query(invitation, details, **{'content.venueid': venueid}))
+          for venueid in active_venue_ids]
+    )
+    # One list in submission number order, whatever their venueid
+    submissions = sorted((submission for venue_submissions in active for submission in venue_submissions),
+                         key=lambda submission: submission.number)
+
+    if len(submissions) + len(inactive.ids) != total:
+        # A submission was withdrawn or desk rejected since the ids were fetched, or has an unexpected venueid
+        await inactive.refresh(async_client, venue_id, invitation, inactive_venue_ids)
+        if len(submissions) + len(inactive.ids) != total:
+            logger.info(f"{total - len(submissions) - len(inactive.ids)} submissions have an unknown venueid, "
+                        f"fetching every submission")
+            return None
+    logger.info(f"Fetched {len(submissions)} active submissions, skipped {len(inactive.ids)} inactive ones")
+    return submissions
@@ -0,0 +1,126 @@
+import os
+import json
+from src.constants import CACHE_DIR
+
+
+ASSIGNMENT_GRAPH_PATH = os.path.join(CACHE_DIR, 'assignment_graph.json')
+NOT_ASSIGNED = 'Not assigned'
+
+
+# Append `value` to the list of `key`, keeping the first-seen order and no duplicates.
+# `seen` holds the (key, value) pairs already in the index, so the check is O(1)
+def add_edge(index, seen, key, value):
+    if (key, value) not in seen:
+        seen.add((key, value))
+        index.setdefault(key, []).append(value)
+
+
+# ----- Assignment graph -----
+class AssignmentGraph:
+    """
+    Who is assigned to what, with forward and reverse indexes:
+    submission <-> ACs, AC <-> SACs and submission <-> reviewers, plus the set
+    of inactive (withdrawn / desk rejected) submissions. The active
+    submissions of each AC and the unassigned submissions are indexed as
+    well, so every lookup is O(1). Built by fetch_submission_metadata and
+    read by the other stages.
+    """
+
+    def __init__(self):
+        self.sub2acs, self.ac2subs = {}, {}
+        self.sub2sacs = {}
+        self.ac2sacs, self.sac2acs = {}, {}
+        # Reviewers are (real id, anonymous id) pairs, reviewer2subs is keyed by the real id
+        self.sub2reviewers, self.reviewer2subs = {}, {}
+        self.inactive = set()
+        # AC -> active submissions, in the order of ac2subs
+        self.ac2active_subs = {}
+        # Submissions without an AC, a dict keeps their insertion order
+        self.unassigned = {}
+        # Index name -> (key, value) pairs already added, see add_edge
+        self._edges = {}
+
+    def add_submission(self, sub_id, acs=(), reviewers=(), sacs=(), active=True):
+        self.sub2acs[sub_id] = list(acs)
+        self.sub2sacs[sub_id] = list(sacs)
+        self.sub2reviewers[sub_id] = [tuple(reviewer) for reviewer in reviewers]
+        for ac_id in acs:
+            self._add_edge('ac2subs', ac_id, sub_id)
+            if active:
+                self._add_edge('ac2active_subs', ac_id, sub_id)
+            for sac_id in sacs:
+                self._add_edge('ac2sacs', ac_id, sac_id)
+                self._add_edge('sac2acs', sac_id, ac_id)
+        for reviewer_real, _ in self.sub2reviewers[sub_id]:
+            self._add_edge('reviewer2subs', reviewer_real, sub_id)
+        for sac_id in sacs:
+            # SACs of unassigned submissions still get a spreadsheet
+            self.sac2acs.setdefault(sac_id, [])
+        if not acs:
+            self.unassigned[sub_id] = None
+        if not active:
+            self.inactive.add(sub_id)
+
+    def _add_edge(self, name, key, value):
+        add_edge(getattr(self, name), self._edges.setdefault(name, set()), key, value)
+
+    def is_active(self, sub_id):
+        return sub_id not in self.inactive
+
+    def active_subs(self, ac_id):
+        return self.ac2active_subs.get(ac_id, [])
+
+    def unassigned_subs(self):
+        return list(self.unassigned)
+
+    def acs_of(self, sub_id):
+        return self.sub2acs.get(sub_id, [])
+
+    def sacs_of(self, ac_id):
+        return self.ac2sacs.get(ac_id, [])
+
+    def reviewers_of(self, sub_id):
+        return self.sub2reviewers.get(sub_id, [])
+
+    def subs_of_reviewer(self, reviewer_id):
+        return self.reviewer2subs.get(reviewer_id, [])
+
+    def max_reviewers(self):
+        return max([len(reviewers) for reviewers in self.sub2reviewers.values()], default=0)
+
+    def max_assigned(self):
+        return max([len(sub_ids) for sub_ids in self.ac2subs.values()], default=0)
+
+    # ----- Persistence -----
+    def save(self, path=ASSIGNMENT_GRAPH_PATH):
+        # The forward edges and reviewer2subs are stored, the other reverse indexes are rebuilt on load
+        data = {
+            'submissions': {
+                sub_id: {
+                    'acs': self.sub2acs[sub_id],
+                    'reviewers': self.sub2reviewers[sub_id],
+                    'sacs': self.sub2sacs[sub_id],
+                }
+                for sub_id in self.sub2acs
+            },
+            'reviewer2subs': self.reviewer2subs,
+            'inactive': sorted(self.inactive),
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path=ASSIGNMENT_GRAPH_PATH):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        graph, inactive = cls(), set(data['inactive'])
+        for sub_id, edges in data['submissions'].items():
+            graph.add_submission(sub_id, edges['acs'], edges['reviewers'], edges['sacs'],
+                                 active=sub_id not in inactive)
+        # Graphs saved before reviewer2subs was stored keep the rebuilt index
+        if 'reviewer2subs' in data:
+            graph.reviewer2subs = data['reviewer2subs']
+            graph._edges['reviewer2subs'] = {
+                (reviewer_id, sub_id) for reviewer_id, sub_ids in graph.reviewer2subs.items() for sub_id in sub_ids
+            }
+        return graph
@@ -0,0 +1,205 @@
+import time
+import asyncio
+import logging
+import httpx
+import openreview
+from src.constants import (
+    ASYNC_TIMEOUT,
+    ASYNC_MAX_RETRIES,
+    MAX_VALUE,
+    PROFILE_BATCH_SIZE,
+    GROUP_PAGE_SIZE,
+)
+from src.profile_cache import batches, profile_aliases, match_requested
+from src.concurrency_limiter import AIMDLimiter, retry_after_seconds
+
+
+logger = logging.getLogger(__name__)
+
+
+# ----- Async OpenReview client -----
+class AsyncOpenReviewClient:
+    """
+    Async access to the OpenReview API for the fetch stages, reusing the
+    login of a synchronous OpenReviewClient.
+
+    Requests go through one pooled httpx client with keep-alive connections,
+    and an adaptive limit (see AIMDLimiter), shared with the other async
+    clients of the cycle, bounds the in-flight requests, so a single event loop can issue thousands of
+    requests without exhausting sockets or tripping the rate limit. Throttled
+    and failed requests are retried. Paged queries fetch their remaining
+    pages concurrently once the total count is known.
+
+    With a RequestCache, groups and profiles are read through it, and
+    concurrent requests for the same group or profile share one request.
+    """
+
+    def __init__(self, client, timeout=ASYNC_TIMEOUT, max_retries=ASYNC_MAX_RETRIES, request_cache=None,
+                 limiter=None):
+        self.limit = client.limit
+        self.request_cache = request_cache
+        self.max_retries = max_retries
+        self.limiter = AIMDLimiter() if limiter is None else limiter
+        # One connection per request the limiter may let through
+        max_connections = self.limiter.max_limit
+        self.http = httpx.AsyncClient(
+            base_url=client.baseurl,
+            headers=client.headers,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def request(self, method, path, params=None, json=None):
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = await self.http.request(method, path, params=params, json=json)
+            except httpx.TransportError:
+                # Timeouts and dropped connections are retried like 5xx answers
+                await self.limiter.on_overload(start)
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(min(MAX_VALUE, 2 ** attempt))
+                continue
+            finally:
+                await self.limiter.release()
+
+            if response.status_code != 429 and response.status_code < 500:
+                await self.limiter.on_success(start)
+                break
+            retry_after = retry_after_seconds(response)
+            await self.limiter.on_overload(start, response.status_code, retry_after)
+            if attempt == self.max_retries:
+                break
+            await asyncio.sleep(retry_after if retry_after is not None else min(MAX_VALUE, 2 ** attempt))
+
+        if response.status_code >= 400:
+            # Same error payload as the synchronous client
+            if 'application/json' in response.headers.get('Content-Type', ''):
+                raise openreview.OpenReviewException(response.json())
+            raise openreview.OpenReviewException({'name': 'Error', 'message': response.text or response.reason_phrase})
+        return response.json()
+
+    async def get_paged(self, path, key, params, page_size):
+        """
+        Every item of a paged query: the first page comes with the total count,
+        the remaining pages are requested concurrently.
+        """
+        first = await self.request('GET', path, params={**params, 'limit': page_size, 'offset': 0, 'with_count': True})
+        items = first[key]
+        if len(items) < page_size:
+            return items
+        pages = await asyncio.gather(*[
+            self.request('GET', path, params={**params, 'limit': page_size, 'offset': offset})
+            for offset in range(page_size, first['count'], page_size)
+        ])
+        for page in pages:
+            items.extend(page[key])
+        return items
+
+    # ----- Groups -----
+    async def get_groups(self, prefix, page_size=GROUP_PAGE_SIZE):
+        groups = await self.get_paged('/groups', 'groups', {'prefix': prefix}, page_size)
+        return [openreview.api.Group.from_json(group) for group in groups]
+
+    async def get_group(self, id):
+        if self.request_cache is None:
+            return await self._get_group(id)
+        return await self.request_cache.aget('get_group', id, lambda: self._get_group(id))
+
+    async def _get_group(self, id):
+        response = await self.request('GET', '/groups', params={'id': id})
+        group = openreview.api.Group.from_json(response['groups'][0])
+
+        # Replace the anonymous ids by the real members, the same way the synchronous client does
+        if group.anonids:
+            anon_prefix = (group.id[:-1] if group.id.endswith('s') else group.id) + '_'
+            members_by_anonid = {g.id: g.members[0] for g in await self.get_groups(anon_prefix) if g.members}
+            group.anon_members = [member for member in group.members if member in members_by_anonid]
+            group.members = [members_by_anonid.get(member, member) for member in group.members]
+        return group
+
+    # ----- Notes -----
+    async def get_all_notes(self, **params):
+        return [openreview.api.Note.from_json(note) for note in await self.get_all_notes_json(**params)]
+
+    # Notes as returned by the API, e.g. to use them as replies
+    async def get_all_notes_json(self, **params):
+        return await self.get_paged('/notes', 'notes', params, self.limit)
+
+    async def get_note_count(self, **params):
+        response = await self.request('GET', '/notes', params={**params, 'limit': 1, 'with_count': True})
+        return response['count']
+
+    async def get_note_edits(self, note_id, sort=None):
+        params = {'note.id': note_id}
+        if sort is not None:
+            params['sort'] = sort
+        response = await self.request('GET', '/notes/edits', params=params)
+        return [openreview.api.Edit.from_json(edit) for edit in response['edits']]
+
+    # ----- Profiles -----
+    async def search_profiles(self, ids=None, confirmedEmails=None):
+        # Single batch, same return values as client.search_profiles
+        if ids is not None:
+            response = await self.request('POST', '/profiles/search', json={'ids': ids})
+            return [openreview.Profile.from_json(profile) for profile in response['profiles']]
+        response = await self.request('POST', '/profiles/search', json={'confirmedEmails': confirmedEmails})
+        profiles_by_email = {}
+        for profile in response['profiles']:
+            for email in profile.get('confirmedEmails', profile['content'].get('emailsConfirmed', [])):
+                profiles_by_email[email] = openreview.Profile.from_json(profile)
+        return profiles_by_email
+
+    async def get_profiles(self, ids_or_emails, batch_size=PROFILE_BATCH_SIZE):
+        """
+        Profiles of tilde ids and emails, all batches are requested concurrently.
+        Returns {key: profile} for every key that has a profile.
+        """
+        if self.request_cache is None:
+            return await self._get_profiles(ids_or_emails, batch_size)
+        return await self.request_cache.aget_many(
+            'get_profile', ids_or_emails, lambda keys: self._get_profiles(keys, batch_size)
+        )
+
+    async def _get_profiles(self, ids_or_emails, batch_size):
+        tilde_ids = [key for key in ids_or_emails if key.startswith('~')]
+        emails = [key for key in ids_or_emails if not key.startswith('~')]
+        results = await asyncio.gather(
+            *[self.search_profiles(ids=batch) for batch in batches(tilde_ids, batch_size)],
+            *[self.search_profiles(confirmedEmails=batch) for batch in batches(emails, batch_size)],
+        )
+
+        rtn = {}
+        for result in results:
+            if isinstance(result, dict):
+                rtn.update(result)
+            else:
+                for profile in result:
+                    for alias in profile_aliases(profile):
+                        rtn[alias] = profile
+        return match_requested(ids_or_emails, rtn)
+
+
+# Run `fn(async_client, *args)` in a fresh event loop, from synchronous code such as the fetch stages
+# The request cache and the concurrency limiter of a CachedOpenReviewClient are shared with the async client,
+# so the limit learned by a stage carries over to the next one
+def run_async(client, fn, *args):
+    async def main():
+        request_cache = getattr(client, 'request_cache', None)
+        limiter = getattr(client, 'limiter', None)
+        async with AsyncOpenReviewClient(client, request_cache=request_cache, limiter=limiter) as async_client:
+            rtn = await fn(async_client, *args)
+            logger.info(f"OpenReview requests: {async_client.limiter.stats}, concurrency limit {async_client.limiter.limit}")
+            return rtn
+    return asyncio.run(main())
@@ -0,0 +1,122 @@
+import time
+import asyncio
+import logging
+from src.constants import (
+    ASYNC_INITIAL_CONCURRENCY,
+    ASYNC_MIN_CONCURRENCY,
+    ASYNC_MAX_CONCURRENCY,
+    ASYNC_LATENCY_TARGET,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# ----- Adaptive concurrency limit -----
+class AIMDLimiter:
+    """
+    Concurrency limit for the OpenReview requests, adapted with additive
+    increase / multiplicative decrease (AIMD).
+
+    Every request that answers within `latency_target` seconds adds
+    1 / limit to the limit, so the limit grows by about one per round of
+    requests. A throttled (HTTP 429), failed (5xx) or slow request halves it,
+    unless it was sent before the previous decrease, so a burst of failures
+    of the requests in flight counts once. A Retry-After delay pauses every
+    new request until it has passed.
+
+    One limiter is meant to outlive the event loops of `run_async`, so the
+    limit learned and a running pause carry over from one stage to the next.
+    """
+
+    def __init__(self, initial=ASYNC_INITIAL_CONCURRENCY, min_limit=ASYNC_MIN_CONCURRENCY,
+                 max_limit=ASYNC_MAX_CONCURRENCY, latency_target=ASYNC_LATENCY_TARGET, decrease=0.5):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._condition, self._condition_loop = None, None
+        self.stats = self._new_stats()
+
+    @property
+    def _cond(self):
+        # An asyncio.Condition is bound to the event loop it is first used in, each run_async has its own
+        loop = asyncio.get_running_loop()
+        if self._condition_loop is not loop:
+            self._condition, self._condition_loop = asyncio.Condition(), loop
+        return self._condition
+
+    def _new_stats(self):
+        return {'requests': 0, 'throttled': 0, 'errors': 0, 'slow': 0, 'max_limit_reached': self.limit}
+
+    @property
+    def limit(self):
+        """Current number of requests allowed in flight."""
+        return int(self._limit)
+
+    def pop_stats(self):
+        """The counters and highest limit reached since the previous call, plus the current limit."""
+        stats, self.stats = dict(self.stats, limit=self.limit), self._new_stats()
+        return stats
+
+    async def acquire(self):
+        async with self._cond:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait > 0:
+                    # Honor Retry-After: wake up when the pause ends or the limit changes
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+                elif self._in_flight >= self.limit:
+                    await self._cond.wait()
+                else:
+                    self._in_flight += 1
+                    return
+
+    async def release(self):
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    # `start` is the time.monotonic() at which the request was sent
+    async def on_success(self, start):
+        self.stats['requests'] += 1
+        if time.monotonic() - start > self.latency_target:
+            self.stats['slow'] += 1
+            await self._decrease(start, 'latency spike')
+            return
+        async with self._cond:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self.stats['max_limit_reached'] = max(self.stats['max_limit_reached'], self.limit)
+            self._cond.notify_all()
+
+    async def on_overload(self, start, status=None, retry_after=None):
+        # `status` is None for timeouts and dropped connections
+        self.stats['requests'] += 1
+        self.stats['throttled' if status == 429 else 'errors'] += 1
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        await self._decrease(start, f'HTTP {status}' if status is not None else 'connection error')
+
+    async def _decrease(self, start, reason):
+        if start < self._last_decrease:
+            return
+        self._last_decrease = time.monotonic()
+        async with self._cond:
+            self._limit = max(self.min_limit, self._limit * self.decrease)
+        logger.info(f"Lowering the OpenReview concurrency limit to {self.limit} ({reason})")
+
+
+# Seconds of a Retry-After header, None if missing or not a number of seconds
+def retry_after_seconds(response):
+    value = response.headers.get('Retry-After')
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
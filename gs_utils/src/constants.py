@@ -4,11 +4,66 @@ CACHE_DIR = ".cache"
 # increase the duration if errors happen oftenly
 SCRIPT_WAIT_PERIOD = 60
 
+# ----- Venue snapshot configs -----
+# the venue group, submissions and replies are fetched once per cycle and shared by all stages
+# persist the snapshot so a restarted process reuses it if it is younger than the max age (in seconds)
+PERSIST_CYCLE_SNAPSHOT = True
+CYCLE_SNAPSHOT_MAX_AGE = 10 * 60
+# only fetch the notes modified since the previous cycle, with a full resync every FULL_RESYNC_EVERY cycles
+INCREMENTAL_SYNC = True
+FULL_RESYNC_EVERY = 12
+NOTES_PAGE_SIZE = 1000
+# full fetches of gs_main.py only download the active submissions with their replies, filtered by venueid
+# server-side, the comprehensive report keeps every submission; the ids of the withdrawn and desk rejected
+# ones are fetched again when older than the max age (in seconds)
+ACTIVE_SUBMISSIONS_ONLY = True
+INACTIVE_IDS_MAX_AGE = 24 * 60 * 60
+# gs_main.py only fetches the replies the stages read, one paged query per reply kind instead of details='replies'
+TARGETED_REPLY_FETCH = True
+CYCLE_REPLY_KINDS = ['reviews', 'meta_reviews', 'rebuttals']
+# content fields requested per reply kind, None requests the whole content (every review field is word counted)
+REPLY_CONTENT_FIELDS = {
+    'reviews': None,
+    'meta_reviews': ['recommendation', 'confidence'],
+    'rebuttals': [],
+}
+
+# ----- OpenReview profile configs -----
+# profiles are searched in batches, the OpenReview API returns at most 1000 per request
+PROFILE_BATCH_SIZE = 1000
+# cached profiles older than this (in seconds) are fetched again and revalidated with their tmdate
+PROFILE_CACHE_TTL = 24 * 60 * 60
+# ids and emails without a profile (ghost authors) are not searched again for this long (in seconds)
+PROFILE_MISS_TTL = 60 * 60
+# per-submission groups are listed by prefix in pages, the OpenReview API returns at most 1000 per request
+GROUP_PAGE_SIZE = 1000
+# the fetch stages send their requests from one event loop over a pool of keep-alive connections, timeout in seconds
+ASYNC_TIMEOUT = 60
+# the number of requests in flight adapts between the min and the max: it grows while requests answer within
+# the latency target (in seconds) and is halved on HTTP 429, 5xx or slower answers. The max is above the former
+# fixed 32 workers so an idle API is used more, the connection pool holds as many connections
+ASYNC_INITIAL_CONCURRENCY = 8
+ASYNC_MIN_CONCURRENCY = 1
+ASYNC_MAX_CONCURRENCY = 96
+ASYNC_LATENCY_TARGET = 5.0
+# throttled and failed requests are retried, after Retry-After or an exponential backoff
+ASYNC_MAX_RETRIES = 5
+# groups and profiles are kept in memory for a few minutes (in seconds), so the requests repeated within a
+# cycle are only sent once, at most REQUEST_CACHE_SIZE entries are kept
+REQUEST_CACHE_TTL = 5 * 60
+REQUEST_CACHE_SIZE = 50000
+
+# ----- Recommendation outlier configs -----
+# named rules evaluated over all papers, see src/outlier_rules.py
+OUTLIER_RULES_PATH = 'outlier_rules.json'
+
 # ----- Google Sheet configs -----
 # usually rows are number of submissions under an AC/SAC, so 100 should be enough
 # 50 columns are the number of reviewers, so 50 should be enough
 ROWS = 100
 COLS = 50
+# only re-upload the AC/SAC sheets whose tables changed since their last upload
+UPLOAD_ONLY_CHANGED = True
 
 # ------ Backoff configs -----
 FACTOR = 10
@@ -0,0 +1,93 @@
+import os
+import time
+import logging
+import openreview
+from src.utils import get_venue_grp, get_submissions
+from src.reply_index import ReplyIndex
+from src.constants import CACHE_DIR, CYCLE_SNAPSHOT_MAX_AGE
+from src.venue_snapshot import (
+    note_to_json,
+    note_from_json,
+    save_snapshot,
+    load_snapshot,
+)
+
+
+CYCLE_SNAPSHOT_PATH = os.path.join(CACHE_DIR, 'cycle_snapshot.json.gz')
+
+logger = logging.getLogger(__name__)
+
+
+# ----- Per-cycle venue snapshot -----
+class CycleSnapshot:
+    """
+    Venue group and submissions (with their replies) of one gs_main cycle.
+    It is fetched once and passed to every fetch_* stage, so the venue is
+    downloaded once per cycle instead of once per stage.
+    """
+
+    def __init__(self, venue_id, venue_grp, submissions, fetched_at=None):
+        self.venue_id = venue_id
+        self.venue_grp = venue_grp
+        self.submissions = submissions
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self.submissions_map = {submission.id: submission for submission in submissions}
+        self._reply_index = None
+
+    @property
+    def reply_index(self):
+        # Built on first use and shared by every stage
+        if self._reply_index is None:
+            self._reply_index = ReplyIndex(self.submissions, self.venue_grp, self.venue_id)
+        return self._reply_index
+
+    # `reply_kinds` limits the replies to the kinds the stages read, all of them by default
+    # `active_only` leaves the withdrawn and desk rejected submissions out, they are kept by default
+    @classmethod
+    def fetch(cls, client, venue_id, store=None, reply_kinds=None, active_only=False):
+        venue_grp = get_venue_grp(client, venue_id)
+        submissions = get_submissions(client, venue_id, venue_grp, store, active_only=active_only,
+                                      reply_kinds=reply_kinds)
+        return cls(venue_id, venue_grp, submissions)
+
+    def save(self, path=CYCLE_SNAPSHOT_PATH):
+        save_snapshot(path, {
+            'venue_id': self.venue_id,
+            'fetched_at': self.fetched_at,
+            'venue_grp': self.venue_grp.to_json(),
+            'submissions': [note_to_json(submission) for submission in self.submissions],
+        })
+
+    @classmethod
+    def load(cls, path=CYCLE_SNAPSHOT_PATH):
+        data = load_snapshot(path)
+        return cls(
+            data['venue_id'],
+            openreview.api.Group.from_json(data['venue_grp']),
+            [note_from_json(submission) for submission in data['submissions']],
+            fetched_at=data['fetched_at'],
+        )
+
+    @classmethod
+    def load_or_fetch(cls, client, venue_id, store=None, path=CYCLE_SNAPSHOT_PATH, max_age=CYCLE_SNAPSHOT_MAX_AGE,
+                      reply_kinds=None, active_only=False):
+        """
+        Reuse the snapshot saved at `path` if it belongs to the venue and is
+        younger than `max_age` seconds (e.g. after a restart), otherwise fetch
+        a new one and save it.
+        """
+        if os.path.exists(path):
+            snapshot = cls.load(path)
+            if snapshot.venue_id == venue_id and time.time() - snapshot.fetched_at <= max_age:
+                logger.info(f"Reusing the venue snapshot saved at {path}")
+                return snapshot
+        snapshot = cls.fetch(client, venue_id, store, reply_kinds, active_only)
+        snapshot.save(path)
+        return snapshot
+
+
+# Stages can still be run on their own, they then fetch their own snapshot
+def get_snapshot(client, snapshot=None):
+    if snapshot is None:
+        snapshot = CycleSnapshot.fetch(client, os.environ["OPENREVIEW_VENUE_ID"])
+    return snapshot
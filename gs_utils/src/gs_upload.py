@@ -7,7 +7,17 @@ import gspread
 import tqdm
 from gspread_formatting import set_column_width
 from gspread_dataframe import get_as_dataframe, set_with_dataframe
-from src.constants import API_CREATE_LIMIT, API_UPDATE_LIMIT, WAIT_TIME, CACHE_DIR, SAC_API_SHEET_UPDATE_LIMIT
+from src.constants import API_CREATE_LIMIT, API_UPDATE_LIMIT, WAIT_TIME, CACHE_DIR, SAC_API_SHEET_UPDATE_LIMIT, UPLOAD_ONLY_CHANGED
+from src.assignment_graph import AssignmentGraph, ASSIGNMENT_GRAPH_PATH
+from src.ac_data_store import (
+    ACDataStore,
+    AC_DATA_STORE_PATH,
+    WORD_COUNT,
+    RATING,
+    PAPER_PROGRESS,
+    REVIEW_PROGRESS,
+    SHEET_DATASETS,
+)
 from src.utils import (
     format_progress,
     drop_unnamed_columns,
@@ -39,37 +49,32 @@ pd.set_option('future.no_silent_downcasting', True)
 def gs_ac_upload(client):
     # NOTE: The `client` variable refers to a Google Sheets client, not an OpenReview client
     cache_path = CACHE_DIR
-    data_path = os.path.join(cache_path, 'data')
-    word_count_path = os.path.join(data_path, 'word_count')
-    rating_path = os.path.join(data_path, 'rating')
-    # reviewerinfo_path = os.path.join(data_path, 'reviewer_info')
-    paper_progress_path = os.path.join(data_path, 'paper_progress')
-    review_progress_path = os.path.join(data_path, 'review_progress')
-    global_progress_path = os.path.join(data_path, 'global_progress')
     ac2gs_path = os.path.join(cache_path, 'ac2gs.json')
 
+    # The per-AC tables written by the fetch stages
+    assert os.path.exists(AC_DATA_STORE_PATH), f"File not found: {AC_DATA_STORE_PATH}"
+    store = ACDataStore()
+
     # Get the maximum assigned submissions
-    ac2id_path = os.path.join(cache_path, 'assign_ac2id.json')
-    with open(ac2id_path, 'r') as f:
-        ac2id = json.load(f)
-    max_assigned = max([len(ids) for ac, ids in ac2id.items() if ac != 'Not assigned'])
+    assignments = AssignmentGraph.load()
+    max_assigned = assignments.max_assigned()
     # There are 2 additional rows between the word count and the progress rows
     # 4 = 2 (additional rows) + 1 (zero-indexed) + 1 (header row)
     progress_row = max_assigned + 4
 
-    # Get all filenames
-    all_filenames = os.listdir(word_count_path)
+    # Get all ACs
+    all_ac_ids = store.ac_ids(WORD_COUNT)
 
     # Create a file for each AC
-    if not os.path.exists(ac2gs_path):
+    created_all = not os.path.exists(ac2gs_path)
+    if created_all:
         ac2gs = {}
 
-        for i, file in enumerate(all_filenames):
-            # Skip AC's with empty word count files (there was one...)
-            if pd.read_csv(os.path.join(word_count_path, file)).empty:
+        for i, ac_name in enumerate(all_ac_ids):
+            # Skip AC's with empty word count tables (there was one...)
+            if store.read_frame(WORD_COUNT, ac_name).empty:
                 continue
 
-            ac_name = os.path.splitext(file)[0]
             spreadsheet = create_spreadsheet(client, ac_name, init='ac')
             ac2gs[ac_name] = spreadsheet.url
 
@@ -90,26 +95,33 @@ def gs_ac_upload(client):
             ac2gs = json.load(f)
 
     # Load the global progress information
-    with open(os.path.join(global_progress_path, 'paper_global_progress.json'), 'r') as f:
-        paper_global_progress = json.load(f)
-    
-    with open(os.path.join(global_progress_path, 'review_global_progress.json'), 'r') as f:
-        review_global_progress = json.load(f)
+    paper_global_progress = store.read_global_progress(PAPER_PROGRESS)
+    review_global_progress = store.read_global_progress(REVIEW_PROGRESS)
     
     ac2gs_modified_flag = False
 
+    # Only the sheets whose tables changed since their last upload are touched,
+    # everything is uploaded when the spreadsheets were just created
+    dirty = store.dirty_acs() if UPLOAD_ONLY_CHANGED and not created_all else None
+    # A global progress change only rewrites the progress row of the other sheets, see below
+    global_changed = store.global_progress_dirty()
+
     # Iterate through the spreadsheet for each AC
-    for i, file in enumerate(tqdm.tqdm(all_filenames)):
+    for i, ac_name in enumerate(tqdm.tqdm(all_ac_ids)):
+        changed = SHEET_DATASETS if dirty is None or ac_name not in ac2gs else dirty.get(ac_name, set())
+        if not changed & SHEET_DATASETS and not global_changed:
+            continue
+
         # Get the word count dataframes, helps us to do the condition check on whether
         # real information is included in the spreadsheet and decide whether to upload
         # ------ Stage 1: word count + progress sheet ------
-        local_df = pd.read_csv(os.path.join(word_count_path, file))
+        local_df = store.read_frame(WORD_COUNT, ac_name)
 
-        # If no data is present, skip the upload
+        # If no data is present, skip the upload, the AC is up to date until its tables change again
         if local_df.empty:
+            store.mark_ac_uploaded(ac_name, [])
             continue
 
-        ac_name = os.path.splitext(file)[0]
         if ac_name in ac2gs:
             spreadsheet = open_spreadsheet(client, ac2gs[ac_name])
         else:
@@ -124,10 +136,8 @@ def gs_ac_upload(client):
 
         # Progress, we force overwrite for the progress contents ---
         # Load the AC's progress1
-        with open(os.path.join(paper_progress_path, f'{ac_name}.json'), 'r') as f:
-            paper_progress = json.load(f)
-        with open(os.path.join(review_progress_path, f'{ac_name}.json'), 'r') as f:
-            review_progress = json.load(f)
+        paper_progress = store.read_progress(PAPER_PROGRESS, ac_name)
+        review_progress = store.read_progress(REVIEW_PROGRESS, ac_name)
 
         # Construct the local dataframe
         progress_df = pd.DataFrame({
@@ -137,75 +147,83 @@ def gs_ac_upload(client):
             'Paper Progress (Global)': [format_progress(paper_global_progress['current'], paper_global_progress['total'])],
         })
 
-        # Get the word count ranges in the spreadsheet
-        # NOTE 1: DataFrame is one row less than the actual sheet (headers!)
-        # NOTE 2: DataFrame rows & cols are one-indexed
-        reviewer_columns = [col for col in local_df.columns if col.startswith('Reviewer ')]
-        reviewer_col_idx = [local_df.columns.get_loc(col) for col in reviewer_columns]
+        # The word count sheet is only rewritten when the table changed
+        if WORD_COUNT in changed:
+            # Get the word count ranges in the spreadsheet
+            # NOTE 1: DataFrame is one row less than the actual sheet (headers!)
+            # NOTE 2: DataFrame rows & cols are one-indexed
+            reviewer_columns = [col for col in local_df.columns if col.startswith('Reviewer ')]
+            reviewer_col_idx = [local_df.columns.get_loc(col) for col in reviewer_columns]
 
-        row_start, col_start = 0, min(reviewer_col_idx)
-        row_end, col_end = local_df.shape[0] - 1, max(reviewer_col_idx)
+            row_start, col_start = 0, min(reviewer_col_idx)
+            row_end, col_end = local_df.shape[0] - 1, max(reviewer_col_idx)
 
-        topleft = gspread.utils.rowcol_to_a1(row_start + 2, col_start + 1)
-        bottomright = gspread.utils.rowcol_to_a1(row_end + 2, col_end + 1)
+            topleft = gspread.utils.rowcol_to_a1(row_start + 2, col_start + 1)
+            bottomright = gspread.utils.rowcol_to_a1(row_end + 2, col_end + 1)
 
-        word_count_range = f'{topleft}:{bottomright}'
+            word_count_range = f'{topleft}:{bottomright}'
 
-        # Get the remote df and drop all rows where all elements are NaN
-        remote_df = drop_unnamed_columns(exec_func_w_backoff(get_as_dataframe, worksheet).dropna(how="all"))
+            # Get the remote df and drop all rows where all elements are NaN
+            remote_df = drop_unnamed_columns(exec_func_w_backoff(get_as_dataframe, worksheet).dropna(how="all"))
 
-        # If the remote dataframe is not empty, we need to copy the "Action?" column
-        if not remote_df.empty:
-            merge_df = local_df.merge(remote_df, on='Submission Number', how='left', suffixes=('', '_remote'))
-            merge_df['Action?'] = merge_df['Action?_remote'].fillna(local_df['Action?'])
-            local_df['Action?'] = merge_df['Action?']
+            # If the remote dataframe is not empty, we need to copy the "Action?" column
+            if not remote_df.empty:
+                merge_df = local_df.merge(remote_df, on='Submission Number', how='left', suffixes=('', '_remote'))
+                merge_df['Action?'] = merge_df['Action?_remote'].fillna(local_df['Action?'])
+                local_df['Action?'] = merge_df['Action?']
 
-            # Clean the current sheet, maybe expensive, but robust to deletion of rows
-            exec_func_w_backoff(worksheet.clear)
+                # Clean the current sheet, maybe expensive, but robust to deletion of rows
+                exec_func_w_backoff(worksheet.clear)
 
-        # If the remote dataframe is empty, we do some formatting
-        else:
-            # Get the total number of rows and columns in the worksheet
-            total_rows = worksheet.row_count
-            total_columns = worksheet.col_count
-            range_str = f'{gspread.utils.rowcol_to_a1(1, 1)}:{gspread.utils.rowcol_to_a1(total_rows, total_columns)}'
-            col_start_str, _, col_end_str, _ = split_range(range_str)
+            # If the remote dataframe is empty, we do some formatting
+            else:
+                # Get the total number of rows and columns in the worksheet
+                total_rows = worksheet.row_count
+                total_columns = worksheet.col_count
+                range_str = f'{gspread.utils.rowcol_to_a1(1, 1)}:{gspread.utils.rowcol_to_a1(total_rows, total_columns)}'
+                col_start_str, _, col_end_str, _ = split_range(range_str)
 
-            # Formatting the worksheet (GLOBAL config)
-            # Bold column names (GLOBAL)
-            bold_column_names(worksheet)
+                # Formatting the worksheet (GLOBAL config)
+                # Bold column names (GLOBAL)
+                bold_column_names(worksheet)
 
-            # Bold progress column names (GLOBAL)
-            progress_col_range_str = (
-                f'{gspread.utils.rowcol_to_a1(progress_row, 1)}:'
-                f'{gspread.utils.rowcol_to_a1(progress_row, len(progress_df.columns))}'
-            )
-            bold_range(worksheet, progress_col_range_str)
+                # Bold progress column names (GLOBAL)
+                progress_col_range_str = (
+                    f'{gspread.utils.rowcol_to_a1(progress_row, 1)}:'
+                    f'{gspread.utils.rowcol_to_a1(progress_row, len(progress_df.columns))}'
+                )
+                bold_range(worksheet, progress_col_range_str)
 
-            # Resize the columns (GLOBAL)
-            exec_func_w_backoff(set_column_width, worksheet, f"{col_start_str}:{col_end_str}", 105)
+                # Resize the columns (GLOBAL)
+                exec_func_w_backoff(set_column_width, worksheet, f"{col_start_str}:{col_end_str}", 105)
 
-            # Set cells to wrap text (GLOBAL)
-            exec_func_w_backoff(worksheet.format, range_str, {"wrapStrategy": "WRAP"})
+                # Set cells to wrap text (GLOBAL)
+                exec_func_w_backoff(worksheet.format, range_str, {"wrapStrategy": "WRAP"})
 
-            # Auto adjust row heights (GLOBAL)
-            exec_func_w_backoff(worksheet.rows_auto_resize, 0, total_rows)
+                # Auto adjust row heights (GLOBAL)
+                exec_func_w_backoff(worksheet.rows_auto_resize, 0, total_rows)
 
-        # Set the local dataframe to the worksheet, force update
-        exec_func_w_backoff(set_with_dataframe, worksheet, local_df, row=1, col=1)
+            # Set the local dataframe to the worksheet, force update
+            exec_func_w_backoff(set_with_dataframe, worksheet, local_df, row=1, col=1)
 
-        # Refresh conditional formatting ranges, as the papers might have changed
-        apply_conditional_coloring(worksheet, word_count_range)
+            # Refresh conditional formatting ranges, as the papers might have changed
+            apply_conditional_coloring(worksheet, word_count_range)
 
-        # Force overwrite the progress sheet with the latest progress
+        # Force overwrite the progress sheet with the latest progress, clearing the word count sheet removes it
         exec_func_w_backoff(set_with_dataframe, worksheet, progress_df, row=progress_row, col=1)
 
+        # Only the global progress changed: the progress row above is the only update, the SACs keep
+        # their copies until the AC's own data changes
+        if not changed & SHEET_DATASETS:
+            continue
+
         # ----- Sheet 2: ratings -----
         # We update things to the rating spreadsheet
-        local_df = pd.read_csv(os.path.join(rating_path, file))
+        local_df = store.read_frame(RATING, ac_name) if RATING in changed else None
 
-        # Skip if the local dataframe is empty
-        if local_df.empty:
+        # Skip if the ratings did not change or the local dataframe is empty
+        if local_df is None or local_df.empty:
+            store.mark_ac_uploaded(ac_name, assignments.sacs_of(ac_name))
             continue
 
         # This will try to open the Rating worksheet, if it does not exist, it will create it
@@ -301,7 +319,7 @@ def gs_ac_upload(client):
         # # Otherwise, we don't even need to load/update the reviewer info
         # if remote_df.empty:
         #     # Get the local dataframe
-        #     local_df = pd.read_csv(os.path.join(reviewerinfo_path, file))
+        #     local_df = store.read_frame(REVIEWER_INFO, ac_name)
         #     set_with_dataframe(worksheet, local_df)
 
         #     # Formatting: Bold column names, larger column width, etc.
@@ -309,37 +327,42 @@ def gs_ac_upload(client):
         #     col_range_str = f'{gspread.utils.rowcol_to_a1(1, 1)[0]}:{gspread.utils.rowcol_to_a1(1, len(local_df.columns))[0]}'
         #     set_column_width(worksheet, col_range_str, 150)
 
+        # The SACs of the AC copy its updated sheets in gs_sac_upload
+        store.mark_ac_uploaded(ac_name, assignments.sacs_of(ac_name))
+
         # Avoid API limit
         if (i + 1) % API_UPDATE_LIMIT == 0:
             time.sleep(WAIT_TIME)
     
+    store.mark_global_progress_uploaded()
+
     # Save the ac2gs mapping if modified
     if ac2gs_modified_flag:
         with open(ac2gs_path, 'w') as f:
             json.dump(ac2gs, f)
 
+    store.close()
+
 
 def gs_sac_upload(client, service):
     cache_path = CACHE_DIR
     ac2gs_path = os.path.join(cache_path, 'ac2gs.json')
     sac2gs_path = os.path.join(cache_path, 'sac2gs.json')
-    assign_sac2ac_path = os.path.join(cache_path, 'assign_sac2ac.json')
 
     assert os.path.exists(ac2gs_path), f"File not found: {ac2gs_path}"
-    assert os.path.exists(assign_sac2ac_path), f"File not found: {assign_sac2ac_path}"
+    assert os.path.exists(ASSIGNMENT_GRAPH_PATH), f"File not found: {ASSIGNMENT_GRAPH_PATH}"
 
     with open(ac2gs_path, 'r') as f:
         ac2gs = json.load(f)
-    with open(assign_sac2ac_path, 'r') as f:
-        assign_sac2ac = json.load(f)
+    assign_sac2ac = AssignmentGraph.load().sac2acs
 
-    if not os.path.exists(sac2gs_path):
+    # The ACs whose sheets were uploaded since the last copy to their SACs
+    store = ACDataStore()
+
+    created_all = not os.path.exists(sac2gs_path)
+    if created_all:
         sac2gs = {}
         for i, (sac, ac_ids) in enumerate(assign_sac2ac.items()):
-            # Skip SACs that have not been assigned
-            if sac == 'Not assigned':
-                continue
-            
             # Only care about SACs that have been assigned, create spreadsheet for them
             spreadsheet = create_spreadsheet(client, sac, init='sac')
             sac2gs[sac] = spreadsheet.url
@@ -357,10 +380,15 @@ def gs_sac_upload(client, service):
         with open(sac2gs_path, 'r') as f:
             sac2gs = json.load(f)
 
+    # Only the sheets of updated ACs are copied again, everything when the spreadsheets were just created
+    dirty = store.dirty_sacs() if UPLOAD_ONLY_CHANGED and not created_all else None
+
     for sac_id, ac_ids in tqdm.tqdm(assign_sac2ac.items()):
-        # Skip SACs that have not been assigned
-        # Skip SACs that have not been assigned to any AC
-        if sac_id == 'Not assigned' or not ac_ids:
+        if dirty is not None:
+            ac_ids = [ac_id for ac_id in ac_ids if ac_id in dirty.get(sac_id, set())]
+
+        # Skip SACs that have not been assigned to any AC, or whose ACs did not change
+        if not ac_ids:
             continue
 
         # Load the spreadsheet for the SAC
@@ -407,5 +435,10 @@ def gs_sac_upload(client, service):
         # NOTE: Copy & Rename may fail, and leave an intermediate sheet with "Copy of" in the name, do a cleanup here
         remove_sheets_starting_with(service, tgt_spreadsheet_id, 'Copy of')
 
+        # The SAC now has the latest sheets of its ACs
+        store.mark_sac_uploaded(sac_id)
+
         # API limit may have reached, wait for a SHORTER while before we take the next SAC
         time.sleep(WAIT_TIME // 2)
+
+    store.close()
@@ -0,0 +1,147 @@
+"""
+Rule engine behind the recommendation outlier report.
+
+Each rule of the rules file (OUTLIER_RULES_PATH) is a named boolean pandas
+expression evaluated over the table of all active papers at once, e.g.
+
+    {"name": "high_score_rejected", "reason": "Avg score > 4, but rejected by AC",
+     "expression": "mean_score >= @high_score and rejected"}
+
+`@name` refers to a value of the "params" section, so thresholds can be tuned
+without touching the expressions. Disabled rules are skipped. The paper table
+is cached after every crawl, so rules can be re-evaluated offline with
+outlier_rules_main.py.
+"""
+import os
+import json
+import warnings
+import numpy as np
+import pandas as pd
+from src.constants import CACHE_DIR, OUTLIER_RULES_PATH
+from src.assignment_graph import NOT_ASSIGNED
+
+
+PAPER_TABLE_PATH = os.path.join(CACHE_DIR, 'data', 'outlier_papers.pkl')
+OUTLIER_REPORT_PATH = os.path.join(CACHE_DIR, 'data', 'recommendation_outlier.csv')
+
+
+# ----- Paper table -----
+# Recommendation of a paper from its (signature, recommendation) meta reviews
+def resolve_recommendation(number, meta_reviews):
+    recommendations = [recommendation for _, recommendation in meta_reviews]
+    if not recommendations:
+        return None
+    if all(recommendation == recommendations[0] for recommendation in recommendations):
+        return recommendations[0]
+    # Program chair first, then Senior Area chair, then Area_chair
+    reviews_map = dict(meta_reviews)
+    if "Program_Chairs" in reviews_map:
+        return reviews_map["Program_Chairs"]
+    if "Senior_Area_Chairs" in reviews_map:
+        return reviews_map["Senior_Area_Chairs"]
+    print(f"Submission {number} has multiple different recommendations from Area Chairs")
+    return None
+
+
+def format_scores(scores):
+    return ', '.join(str(int(score)) if score % 1 == 0 else str(score) for score in scores if not np.isnan(score))
+
+
+def build_paper_table(assignments, ratings, reply_index):
+    """
+    One row per active paper with its final scores (falling back to the
+    initial ones), score statistics, recommendation and chairs. A paper with
+    several ACs is listed under the first one.
+    """
+    sub_ids, ac_ids = [], []
+    seen = set()
+    # Submissions without an AC are reported as well
+    for ac_id, ac_sub_ids in list(assignments.ac2subs.items()) + [(NOT_ASSIGNED, assignments.unassigned_subs())]:
+        for sub_id in ac_sub_ids:
+            if assignments.is_active(sub_id) and sub_id not in seen:
+                seen.add(sub_id)
+                sub_ids.append(sub_id)
+                ac_ids.append(ac_id)
+
+    rows = ratings.rows(sub_ids)
+    scores = ratings.effective_final[rows] if len(rows) else np.empty((0, ratings.effective_final.shape[1]))
+    numbers = ratings.numbers[rows]
+    recommendations = [
+        resolve_recommendation(number, [
+            (reply['signatures'][0].split("/")[-1], reply['content']['recommendation']['value'])
+            for reply in reply_index.meta_reviews(sub_id)
+        ])
+        for sub_id, number in zip(sub_ids, numbers)
+    ]
+
+    with warnings.catch_warnings():
+        # Papers without any review get NaN statistics
+        warnings.simplefilter('ignore', RuntimeWarning)
+        table = pd.DataFrame({
+            'number': numbers,
+            'scores': [format_scores(row) for row in scores],
+            'review_count': ratings.review_count[rows],
+            'mean_score': np.nanmean(scores, axis=1),
+            'min_score': np.nanmin(scores, axis=1) if scores.shape[1] else np.nan,
+            'max_score': np.nanmax(scores, axis=1) if scores.shape[1] else np.nan,
+            'score_variance': ratings.final_variance[rows],
+            'accept_votes': (scores > 3.5).sum(axis=1),
+            'reject_votes': (scores <= 3.5).sum(axis=1),
+            'recommendation': pd.Series(recommendations, dtype=object),
+            'area_chairs': ac_ids,
+            'senior_area_chairs': [', '.join(assignments.sacs_of(ac_id)) for ac_id in ac_ids],
+        })
+    table['has_recommendation'] = table['recommendation'].notna()
+    table['accepted'] = table['recommendation'].fillna('').str.contains('Accept')
+    table['rejected'] = table['recommendation'].fillna('').str.contains('Reject')
+    return table
+
+
+def save_paper_table(table, path=PAPER_TABLE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table.to_pickle(path)
+
+
+def load_paper_table(path=PAPER_TABLE_PATH):
+    return pd.read_pickle(path)
+
+
+# ----- Rules -----
+def load_rules(path=OUTLIER_RULES_PATH):
+    with open(path, 'r') as f:
+        config = json.load(f)
+    rules = [rule for rule in config['rules'] if rule.get('enabled', True)]
+    return config.get('params', {}), rules
+
+
+def evaluate_rules(table, rules, params):
+    """
+    Evaluate every rule over the whole table, returns the outlier report with
+    one row per flagged paper and the reasons of all matching rules.
+    """
+    reasons = pd.Series('', index=table.index, dtype=object)
+    for rule in rules:
+        mask = table.eval(rule['expression'], local_dict=params, engine='python')
+        mask = pd.Series(mask, index=table.index).fillna(False).astype(bool)
+        reasons = reasons + np.where(mask, '; ' + rule['reason'], '')
+
+    flagged = reasons != ''
+    reasons = reasons.str[2:]
+    out = pd.DataFrame({
+        "Submission Number": table.loc[flagged, 'number'],
+        "Scores": table.loc[flagged, 'scores'],
+        "Recommendation": table.loc[flagged, 'recommendation'].fillna('N/A'),
+        "Area Chair(s)": table.loc[flagged, 'area_chairs'],
+        "Senior Area Chair(s)": table.loc[flagged, 'senior_area_chairs'],
+        "Reason": reasons[flagged],
+    })
+    # Sort the Recommendation column, keep all 'N/A' to the bottom
+    return out.sort_values(by=['Recommendation'], key=lambda x: x.replace('N/A', 'ZZZ'))
+
+
+def write_outlier_report(table, rules_path=OUTLIER_RULES_PATH, output_path=OUTLIER_REPORT_PATH):
+    params, rules = load_rules(rules_path)
+    out = evaluate_rules(table, rules, params)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    out.to_csv(output_path, index=False)
+    return out
@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import openreview
+from src.constants import CACHE_DIR, PROFILE_CACHE_TTL, PROFILE_MISS_TTL, PROFILE_BATCH_SIZE
+
+
+PROFILE_CACHE_PATH = os.path.join(CACHE_DIR, 'profiles.sqlite')
+
+
+# ----- Profile fetching utils -----
+def batches(items, batch_size=PROFILE_BATCH_SIZE):
+    for i in range(0, len(items), batch_size):
+        yield items[i:i + batch_size]
+
+
+def profile_aliases(profile):
+    """Every key a profile can be looked up with: its id, name usernames and emails."""
+    aliases = {profile.id}
+    for name in profile.content.get('names', []):
+        if name.get('username'):
+            aliases.add(name['username'])
+    for key in ['emails', 'emailsConfirmed']:
+        for email in profile.content.get(key, []):
+            # Emails of other users may come back obfuscated, e.g. ****@gmail.com
+            if '*' not in email:
+                aliases.add(email)
+    if profile.content.get('preferredEmail'):
+        aliases.add(profile.content['preferredEmail'])
+    return aliases
+
+
+# Map the requested keys back to the found profiles. The email search answers with the
+# confirmed emails, which are lowercase, so emails are matched without case
+def match_requested(ids_or_emails, found):
+    by_email = {key.lower(): profile for key, profile in found.items() if not key.startswith('~')}
+    rtn = {}
+    for key in ids_or_emails:
+        if key in found:
+            rtn[key] = found[key]
+        elif not key.startswith('~') and key.lower() in by_email:
+            rtn[key] = by_email[key.lower()]
+    return rtn
+
+
+def fetch_profiles(client, ids_or_emails, batch_size=PROFILE_BATCH_SIZE):
+    """
+    Search the profiles of the given tilde ids and emails in batches.
+
+    Returns a dictionary mapping each requested key to its profile, keys
+    without a profile are left out.
+    """
+    tilde_ids = [key for key in ids_or_emails if key.startswith('~')]
+    emails = [key for key in ids_or_emails if not key.startswith('~')]
+
+    rtn = {}
+    for batch in batches(tilde_ids, batch_size):
+        for profile in client.search_profiles(ids=batch):
+            for alias in profile_aliases(profile):
+                rtn[alias] = profile
+    for batch in batches(emails, batch_size):
+        for email, profile in client.search_profiles(confirmedEmails=batch).items():
+            rtn[email] = profile
+    return match_requested(ids_or_emails, rtn)
+
+
+def fetch_profile_tmdates(client, profile_ids, batch_size=PROFILE_BATCH_SIZE):
+    """
+    The modification date (tmdate) of each profile id, without the profile
+    content. Returns {profile_id: tmdate}, profiles not found are left out.
+    """
+    rtn = {}
+    for batch in batches(list(profile_ids), batch_size):
+        response = client.session.post(client.profiles_search_url, json={'ids': batch},
+                                       params={'select': 'id,tmdate'}, headers=client.headers)
+        if response.status_code >= 400:
+            raise openreview.OpenReviewException(response.json() if response.content else response.reason)
+        for profile in response.json()['profiles']:
+            rtn[profile['id']] = profile.get('tmdate')
+    return rtn
+
+
+# ----- Persistent profile cache -----
+class ProfileCache:
+    """
+    SQLite backed cache of OpenReview profiles, keyed by profile id and by
+    every name username and email alias of the profile.
+
+    Entries younger than `ttl` seconds are served from disk. Older entries
+    are revalidated with their modification date (tmdate) when a tmdate
+    lookup is given, and only fetched again when the profile changed;
+    otherwise they are fetched again together with the misses, and only
+    overwritten when the fetched profile is not older than the cached one.
+
+    Keys without a profile (ghost authors) are remembered for `miss_ttl`
+    seconds, at most `ttl`, and not searched again in the meantime.
+    """
+
+    def __init__(self, path=PROFILE_CACHE_PATH, ttl=PROFILE_CACHE_TTL, miss_ttl=PROFILE_MISS_TTL):
+        self.path = path
+        self.ttl = ttl
+        # A miss never outlives a cached profile
+        self.miss_ttl = min(ttl, miss_ttl)
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'unchanged': 0, 'known_missing': 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS profiles (
+                id TEXT PRIMARY KEY,
+                tmdate INTEGER,
+                fetched_at REAL,
+                data TEXT
+            );
+            CREATE TABLE IF NOT EXISTS aliases (
+                alias TEXT PRIMARY KEY,
+                profile_id TEXT
+            );
+            CREATE TABLE IF NOT EXISTS missing (
+                alias TEXT PRIMARY KEY,
+                fetched_at REAL
+            );
+        """)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def lookup(self, ids_or_emails):
+        """
+        Return {key: (profile, fetched_at)} for every cached key, fresh or not.
+        """
+        rtn = {}
+        with self._lock:
+            for batch in batches(list(ids_or_emails), 500):
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    f'SELECT a.alias, p.data, p.fetched_at FROM aliases a JOIN profiles p ON a.profile_id = p.id '
+                    f'WHERE a.alias IN ({placeholders})', batch
+                ).fetchall()
+                for alias, data, fetched_at in rows:
+                    rtn[alias] = (openreview.Profile.from_json(json.loads(data)), fetched_at)
+        return rtn
+
+    def lookup_missing(self, ids_or_emails):
+        """
+        Return the keys recorded without a profile less than `miss_ttl` seconds ago.
+        """
+        rtn = set()
+        since = time.time() - self.miss_ttl
+        with self._lock:
+            for batch in batches(list(ids_or_emails), 500):
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    f'SELECT alias FROM missing WHERE alias IN ({placeholders}) AND fetched_at >= ?', batch + [since]
+                ).fetchall()
+                rtn.update(alias for alias, in rows)
+        return rtn
+
+    def put_missing(self, ids_or_emails):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO missing (alias, fetched_at) VALUES (?, ?)',
+                                   [(key, now) for key in ids_or_emails])
+
+    def touch(self, profile_ids):
+        """Mark cached profiles as revalidated now, without fetching them."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany('UPDATE profiles SET fetched_at = ? WHERE id = ?',
+                                   [(now, profile_id) for profile_id in profile_ids])
+
+    def put(self, profiles, requested=None):
+        """
+        Store profiles, `requested` optionally maps extra lookup keys to profiles
+        (e.g. the emails they were searched with).
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            for profile in profiles:
+                row = self._conn.execute('SELECT tmdate FROM profiles WHERE id = ?', (profile.id,)).fetchone()
+                if row is not None and row[0] and profile.tmdate and profile.tmdate <= row[0]:
+                    # Revalidated: the profile has not been modified since we cached it
+                    self._conn.execute('UPDATE profiles SET fetched_at = ? WHERE id = ?', (now, profile.id))
+                    self.stats['unchanged'] += 1
+                else:
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO profiles (id, tmdate, fetched_at, data) VALUES (?, ?, ?, ?)',
+                        (profile.id, profile.tmdate, now, json.dumps(profile.to_json()))
+                    )
+                aliases = profile_aliases(profile)
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO aliases (alias, profile_id) VALUES (?, ?)',
+                    [(alias, profile.id) for alias in aliases]
+                )
+                self._conn.executemany('DELETE FROM missing WHERE alias = ?', [(alias,) for alias in aliases])
+            for key, profile in (requested or {}).items():
+                self._conn.execute('INSERT OR REPLACE INTO aliases (alias, profile_id) VALUES (?, ?)',
+                                   (key, profile.id))
+                self._conn.execute('DELETE FROM missing WHERE alias = ?', (key,))
+
+    def get_many(self, ids_or_emails, fetch, fetch_tmdates=None):
+        """
+        Get the profiles of many ids or emails, fetching only the misses.
+
+        `fetch` is called once with the list of keys that are missing or
+        expired, and must return a {key: profile} dictionary, e.g.
+        `lambda keys: fetch_profiles(client, keys)`. With `fetch_tmdates`,
+        e.g. `lambda ids: fetch_profile_tmdates(client, ids)`, the expired
+        entries whose profile did not change are kept without being fetched.
+        Returns {key: profile} for every key that has a profile.
+        """
+        keys = list(dict.fromkeys(ids_or_emails))
+        cached = self.lookup(keys)
+        known_missing = self.lookup_missing([key for key in keys if key not in cached])
+        now = time.time()
+
+        rtn, to_fetch, stale = {}, [], []
+        for key in keys:
+            if key in known_missing:
+                self.stats['known_missing'] += 1
+            elif key not in cached:
+                self.stats['misses'] += 1
+                to_fetch.append(key)
+            elif now - cached[key][1] > self.ttl:
+                self.stats['stale'] += 1
+                stale.append(key)
+            else:
+                self.stats['hits'] += 1
+                rtn[key] = cached[key][0]
+
+        if stale and fetch_tmdates is not None:
+            # Only the profiles modified since they were cached are fetched again
+            profiles = {cached[key][0].id: cached[key][0] for key in stale}
+            tmdates = fetch_tmdates(list(profiles))
+            unchanged = {profile_id for profile_id, profile in profiles.items()
+                         if profile.tmdate and tmdates.get(profile_id) and tmdates[profile_id] <= profile.tmdate}
+            self.touch(unchanged)
+            for key in stale:
+                if cached[key][0].id in unchanged:
+                    self.stats['unchanged'] += 1
+                    rtn[key] = cached[key][0]
+            stale = [key for key in stale if cached[key][0].id not in unchanged]
+        to_fetch += stale
+
+        if to_fetch:
+            fetched = fetch(to_fetch)
+            self.put({profile.id: profile for profile in fetched.values()}.values(), requested=fetched)
+            self.put_missing([key for key in to_fetch if key not in fetched and key not in cached])
+            for key in to_fetch:
+                if key in fetched:
+                    rtn[key] = fetched[key]
+                elif key in cached:
+                    # Keep serving the expired entry if the profile could not be fetched again
+                    rtn[key] = cached[key][0]
+        return rtn
+
+
+# Shortcut for the common case: cached, batched profile search, expired entries are revalidated with their tmdate
+# `fetch` replaces the sequential fetch_profiles, e.g. with the concurrent AsyncOpenReviewClient.get_profiles
+def get_profiles_cached(client, ids_or_emails, cache=None, fetch=None):
+    if fetch is None:
+        fetch = lambda keys: fetch_profiles(client, keys)
+    fetch_tmdates = lambda profile_ids: fetch_profile_tmdates(client, profile_ids)
+    if cache is None:
+        with ProfileCache() as cache:
+            return cache.get_many(ids_or_emails, fetch, fetch_tmdates)
+    return cache.get_many(ids_or_emails, fetch, fetch_tmdates)
@@ -0,0 +1,92 @@
+import warnings
+import numpy as np
+import pandas as pd
+
+
+# Rating value of a review field, None / missing become NaN
+def rating_value(content, field):
+    value = content.get(field, {}).get('value')
+    return np.nan if value is None else value
+
+
+# Row-wise mean over the non-NaN entries, 0 for rows without any
+def nanmean_or_zero(values):
+    counts = (~np.isnan(values)).sum(axis=1)
+    sums = np.nansum(values, axis=1)
+    return np.divide(sums, counts, out=np.zeros(len(values)), where=counts > 0)
+
+
+# ----- Rating matrix -----
+class RatingMatrix:
+    """
+    Initial and final ratings of the active submissions, stored as
+    (submissions x reviewer slots) float arrays with NaN for missing ratings.
+    Slot i of a submission is its i-th assigned reviewer. Reviews without a
+    final rating fall back to their initial rating, all per-paper statistics
+    are computed once for the whole venue and sliced per AC.
+    """
+
+    def __init__(self, sub_ids, numbers, initial, final, rebuttal):
+        self.sub_ids = sub_ids
+        self.row_of = {sub_id: i for i, sub_id in enumerate(sub_ids)}
+        self.numbers = numbers
+        self.initial = initial
+        self.final = final
+        self.rebuttal = rebuttal
+
+        # Final ratings fall back to the initial ones
+        self.effective_final = np.where(np.isnan(final), initial, final)
+        self.avg_initial = np.round(nanmean_or_zero(initial), 3)
+        self.avg_final = np.round(nanmean_or_zero(self.effective_final), 3)
+        self.review_count = (~np.isnan(self.effective_final)).sum(axis=1)
+        with warnings.catch_warnings():
+            # Rows without any rating get a NaN variance
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.final_variance = np.nanvar(self.effective_final, axis=1)
+
+    @classmethod
+    def build(cls, assignments, reply_index, submissions_map):
+        sub_ids = [sub_id for sub_id in assignments.sub2acs if assignments.is_active(sub_id)]
+        slots = assignments.max_reviewers()
+        initial = np.full((len(sub_ids), slots), np.nan)
+        final = np.full((len(sub_ids), slots), np.nan)
+        rebuttal = np.zeros(len(sub_ids), dtype=bool)
+
+        for row, sub_id in enumerate(sub_ids):
+            slot_of = {anon: slot for slot, (_, anon) in enumerate(assignments.reviewers_of(sub_id))}
+            for reply in reply_index.reviews(sub_id):
+                # Reviews of reviewers that are no longer assigned have no slot
+                slot = slot_of.get(reply['writers'][-1].split('/')[-1])
+                if slot is not None:
+                    initial[row, slot] = rating_value(reply['content'], 'rating')
+                    final[row, slot] = rating_value(reply['content'], 'final_rating')
+            rebuttal[row] = reply_index.has(sub_id, 'rebuttals')
+
+        numbers = np.array([submissions_map[sub_id].number for sub_id in sub_ids], dtype=int)
+        return cls(sub_ids, numbers, initial, final, rebuttal)
+
+    def rows(self, sub_ids):
+        return np.array([self.row_of[sub_id] for sub_id in sub_ids], dtype=int)
+
+    def frame(self, sub_ids):
+        """
+        The rating sheet of a set of submissions, e.g. the active ones of an AC.
+        """
+        rows = self.rows(sub_ids)
+        data = {
+            "Submission Number": self.numbers[rows],
+            "Rebuttal Submitted": self.rebuttal[rows],
+            "Avg Initial Rtng": self.avg_initial[rows],
+            "Avg Final Rtng": self.avg_final[rows],
+        }
+        for i in range(self.initial.shape[1]):
+            data[f"Rvw {i+1} Initial Rtng"] = self.initial[rows, i]
+            data[f"Rvw {i+1} Final Rtng"] = self.final[rows, i]
+        df = pd.DataFrame(data)
+
+        # Integer ratings without any gap are written as integers, not floats
+        for col in df.columns[4:]:
+            values = df[col]
+            if len(values) and values.notna().all() and (values % 1 == 0).all():
+                df[col] = values.astype(int)
+        return df
@@ -0,0 +1,55 @@
+import asyncio
+from src.reply_index import reply_kind_names
+from src.constants import REPLY_CONTENT_FIELDS
+
+
+# Reply fields read by the ReplyIndex, the word count memo, the submission store and the stages, besides the content
+REPLY_FIELDS = ['id', 'forum', 'replyto', 'invitations', 'signatures', 'writers', 'cdate', 'mdate', 'tmdate', 'ddate']
+
+
+# ----- Targeted reply fetching -----
+# Fields to request for a reply kind, None requests every field (no projection)
+def reply_select(kind, content_fields=REPLY_CONTENT_FIELDS):
+    fields = content_fields.get(kind)
+    if fields is None:
+        return None
+    return ','.join(REPLY_FIELDS + [f'content.{field}' for field in fields])
+
+
+# Query parameters of the replies of each kind and their projected fields. Replies are posted to the
+# per-submission invitations, e.g. `{venue_id}/Submission1/-/Official_Review`, so they are matched on
+# the venue-wide parent invitation they extend (parentInvitations), not on `invitation`
+def reply_queries(venue_id, venue_grp, kinds, content_fields=REPLY_CONTENT_FIELDS):
+    names = {kind: name for name, kind in reply_kind_names(venue_grp).items()}
+    queries = []
+    for kind in kinds:
+        params = {'parentInvitations': f'{venue_id}/-/{names[kind]}'}
+        select = reply_select(kind, content_fields)
+        if select is not None:
+            params['select'] = select
+        queries.append(params)
+    return queries
+
+
+async def fetch_replies(async_client, venue_id, venue_grp, kinds, content_fields=REPLY_CONTENT_FIELDS):
+    """
+    The replies of the given kinds (see REPLY_KINDS) of every submission,
+    with one paged query per kind (see reply_queries). Returns the replies
+    as json, like details['replies'].
+    """
+    queries = reply_queries(venue_id, venue_grp, kinds, content_fields)
+    results = await asyncio.gather(*[async_client.get_all_notes_json(**params) for params in queries])
+    return [reply for replies in results for reply in replies]
+
+
+# Set details['replies'] of every submission to its fetched replies, replies of other submissions are dropped
+def attach_replies(submissions, replies):
+    by_forum = {submission.id: [] for submission in submissions}
+    for reply in replies:
+        if reply['forum'] in by_forum and reply['id'] != reply['forum']:
+            reply.setdefault('content', {})
+            by_forum[reply['forum']].append(reply)
+    for submission in submissions:
+        # Same order as the replies of details='replies'
+        submission.details = {'replies': sorted(by_forum[submission.id], key=lambda reply: reply['cdate'])}
+    return submissions
@@ -0,0 +1,53 @@
+REPLY_KINDS = ['reviews', 'meta_reviews', 'rebuttals', 'comments', 'decisions', 'withdrawals']
+
+
+# Invitation name -> reply kind, names missing from the venue group fall back to the OpenReview defaults
+def reply_kind_names(venue_grp):
+    def name(key, default):
+        return venue_grp.content.get(key, {}).get('value', default)
+
+    return {
+        name('review_name', 'Official_Review'): 'reviews',
+        name('meta_review_name', 'Meta_Review'): 'meta_reviews',
+        name('rebuttal_name', 'Rebuttal'): 'rebuttals',
+        name('comment_name', 'Official_Comment'): 'comments',
+        name('decision_name', 'Decision'): 'decisions',
+        name('withdrawal_name', 'Withdrawal'): 'withdrawals',
+    }
+
+
+# ----- Reply index -----
+class ReplyIndex:
+    """
+    Replies of every submission bucketed by kind (see REPLY_KINDS), built with
+    a single pass over `submission.details['replies']`. A reply belongs to a
+    kind when one of its invitations is `{venue_id}/{submission_name}{number}/-/{name}`.
+    """
+
+    def __init__(self, submissions, venue_grp, venue_id):
+        submission_name = venue_grp.content['submission_name']['value']
+        kind_names = reply_kind_names(venue_grp)
+
+        self.index = {}
+        for submission in submissions:
+            buckets = {kind: [] for kind in REPLY_KINDS}
+            prefix = f'{venue_id}/{submission_name}{submission.number}/-/'
+            for reply in submission.details['replies']:
+                for invitation in reply['invitations']:
+                    kind = kind_names.get(invitation[len(prefix):]) if invitation.startswith(prefix) else None
+                    if kind is not None:
+                        buckets[kind].append(reply)
+                        break
+            self.index[submission.id] = buckets
+
+    def get(self, sub_id, kind):
+        return self.index[sub_id][kind]
+
+    def reviews(self, sub_id):
+        return self.index[sub_id]['reviews']
+
+    def meta_reviews(self, sub_id):
+        return self.index[sub_id]['meta_reviews']
+
+    def has(self, sub_id, kind):
+        return len(self.index[sub_id][kind]) > 0
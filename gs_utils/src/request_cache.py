@@ -0,0 +1,177 @@
+import time
+import asyncio
+from collections import OrderedDict
+from src.constants import REQUEST_CACHE_TTL, REQUEST_CACHE_SIZE
+from src.concurrency_limiter import AIMDLimiter
+
+
+# Cached as "no such object" so that missing profiles are not searched again within the TTL
+MISSING = object()
+
+
+# Pass the error of a request to the coalesced callers waiting for it
+def _fail(future, e):
+    if isinstance(e, asyncio.CancelledError):
+        future.cancel()
+        return
+    future.set_exception(e)
+    # Retrieved here so an error nobody else waited for is not reported as never retrieved
+    future.exception()
+
+
+# ----- In-memory request cache -----
+class RequestCache:
+    """
+    Short-lived in-memory LRU cache of OpenReview responses, keyed by method
+    and arguments, with at most `max_size` entries younger than `ttl` seconds.
+
+    Concurrent async requests for the same key are coalesced (single flight):
+    the first one is sent, the others wait for its response. Hits, misses
+    and coalesced requests are counted per method, see `pop_stats`.
+
+    Cached objects are shared between the callers and must not be modified.
+    """
+
+    def __init__(self, ttl=REQUEST_CACHE_TTL, max_size=REQUEST_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        # (method, key) -> (stored at, value)
+        self._entries = OrderedDict()
+        # (method, key) -> future of the request in flight, only while an event loop runs it
+        self._in_flight = {}
+        self.stats = {}
+
+    def _count(self, method, stat, n=1):
+        counts = self.stats.setdefault(method, {'hits': 0, 'misses': 0, 'coalesced': 0})
+        counts[stat] += n
+
+    def _lookup(self, method, key):
+        entry = self._entries.get((method, key))
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._entries[(method, key)]
+            return None
+        self._entries.move_to_end((method, key))
+        return entry
+
+    def _store(self, method, key, value):
+        self._entries[(method, key)] = (time.monotonic(), value)
+        self._entries.move_to_end((method, key))
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop_stats(self):
+        """The per-method counters since the previous call, e.g. of one cycle."""
+        stats, self.stats = self.stats, {}
+        return stats
+
+    def clear(self):
+        self._entries.clear()
+
+    # ----- Read-through accessors -----
+    def get(self, method, key, fetch):
+        """Synchronous read-through: `fetch()` is called on a miss."""
+        entry = self._lookup(method, key)
+        if entry is not None:
+            self._count(method, 'hits')
+            return entry[1]
+        self._count(method, 'misses')
+        value = fetch()
+        self._store(method, key, value)
+        return value
+
+    async def aget(self, method, key, fetch):
+        """Async read-through: `fetch()` returns a coroutine, awaited once per key at a time."""
+        entry = self._lookup(method, key)
+        if entry is not None:
+            self._count(method, 'hits')
+            return entry[1]
+        if (method, key) in self._in_flight:
+            self._count(method, 'coalesced')
+            return await asyncio.shield(self._in_flight[(method, key)])
+
+        self._count(method, 'misses')
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[(method, key)] = future
+        try:
+            value = await fetch()
+        except BaseException as e:
+            _fail(future, e)
+            raise
+        else:
+            self._store(method, key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._in_flight[(method, key)]
+
+    async def aget_many(self, method, keys, fetch):
+        """
+        Async read-through of many keys at once, e.g. profile lookups. Only the
+        keys neither cached nor in flight are passed to `fetch(keys)`, which
+        returns {key: value} and leaves out the keys without a value.
+        Returns {key: value} for every key that has a value.
+        """
+        rtn, waiting, to_fetch = {}, {}, []
+        for key in dict.fromkeys(keys):
+            entry = self._lookup(method, key)
+            if entry is not None:
+                self._count(method, 'hits')
+                if entry[1] is not MISSING:
+                    rtn[key] = entry[1]
+            elif (method, key) in self._in_flight:
+                self._count(method, 'coalesced')
+                waiting[key] = self._in_flight[(method, key)]
+            else:
+                self._count(method, 'misses')
+                to_fetch.append(key)
+
+        if to_fetch:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in to_fetch}
+            for key, future in futures.items():
+                self._in_flight[(method, key)] = future
+            try:
+                fetched = await fetch(to_fetch)
+            except BaseException as e:
+                for future in futures.values():
+                    _fail(future, e)
+                raise
+            else:
+                for key, future in futures.items():
+                    value = fetched.get(key, MISSING)
+                    self._store(method, key, value)
+                    future.set_result(value)
+                    if value is not MISSING:
+                        rtn[key] = value
+            finally:
+                for key in to_fetch:
+                    del self._in_flight[(method, key)]
+
+        for key, future in waiting.items():
+            value = await asyncio.shield(future)
+            if value is not MISSING:
+                rtn[key] = value
+        return {key: rtn[key] for key in keys if key in rtn}
+
+
+# ----- Cached OpenReview client -----
+class CachedOpenReviewClient:
+    """
+    OpenReviewClient whose get_group goes through a RequestCache. Every other
+    attribute is the wrapped client's. The async clients of `run_async` share
+    the same cache for their group and profile requests, and the same
+    concurrency limiter, see `limiter.pop_stats`.
+    """
+
+    def __init__(self, client, request_cache=None, limiter=None):
+        self.client = client
+        self.request_cache = RequestCache() if request_cache is None else request_cache
+        self.limiter = AIMDLimiter() if limiter is None else limiter
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def get_group(self, id):
+        return self.request_cache.get('get_group', id, lambda: self.client.get_group(id))
@@ -0,0 +1,166 @@
+import os
+import logging
+import openreview
+from src.constants import CACHE_DIR, FULL_RESYNC_EVERY, NOTES_PAGE_SIZE
+from src.venue_snapshot import (
+    note_to_json,
+    note_from_json,
+    save_snapshot,
+    load_snapshot,
+)
+
+
+SUBMISSION_STORE_PATH = os.path.join(CACHE_DIR, 'submission_store.json.gz')
+
+logger = logging.getLogger(__name__)
+
+
+# ----- Incremental note fetching utils -----
+# Page through the notes matching `query`, e.g. {'domain': venue_id}, most recently modified first, and stop at `since`
+def iter_modified_notes(client, query, since, page_size=NOTES_PAGE_SIZE):
+    offset = 0
+    while True:
+        # get_notes does not expose the domain filter, query the notes endpoint directly
+        response = client.session.get(client.notes_url, headers=client.headers, params={
+            **query,
+            'sort': 'tmdate:desc',
+            'trash': 'true',
+            'limit': page_size,
+            'offset': offset,
+        })
+        if response.status_code >= 400:
+            raise openreview.OpenReviewException(response.json() if response.content else response.reason)
+        notes = response.json()['notes']
+        for note in notes:
+            if note['tmdate'] < since:
+                return
+            yield note
+        if len(notes) < page_size:
+            return
+        offset += page_size
+
+
+# ----- Local submission store -----
+class SubmissionStore:
+    """
+    Local copy of the venue submissions and their replies, kept up to date
+    across cycles. A full fetch records the highest tmdate seen, later syncs
+    only request the notes modified since then and merge them in. Every
+    `full_resync_every` syncs the store is rebuilt from a full fetch.
+
+    A store built from the replies of some kinds only (see reply_fetch) syncs
+    the same kinds, with the same projected fields, and is rebuilt when the
+    kinds change.
+    """
+
+    def __init__(self, path=SUBMISSION_STORE_PATH, full_resync_every=FULL_RESYNC_EVERY):
+        self.path = path
+        self.full_resync_every = full_resync_every
+        self.venue_id = None
+        self.watermark = 0
+        self.syncs_since_full = 0
+        # Reply kinds of the store, None for every reply
+        self.reply_kinds = None
+        # id -> submission json (without details), forum id -> {reply id -> reply json}
+        self.submissions = {}
+        self.replies = {}
+
+    @classmethod
+    def load(cls, path=SUBMISSION_STORE_PATH, full_resync_every=FULL_RESYNC_EVERY):
+        store = cls(path, full_resync_every)
+        if os.path.exists(path):
+            data = load_snapshot(path)
+            store.venue_id = data['venue_id']
+            store.watermark = data['watermark']
+            store.syncs_since_full = data['syncs_since_full']
+            store.reply_kinds = data.get('reply_kinds')
+            store.submissions = data['submissions']
+            store.replies = data['replies']
+        return store
+
+    def save(self):
+        save_snapshot(self.path, {
+            'venue_id': self.venue_id,
+            'watermark': self.watermark,
+            'syncs_since_full': self.syncs_since_full,
+            'reply_kinds': self.reply_kinds,
+            'submissions': self.submissions,
+            'replies': self.replies,
+        })
+
+    def needs_full_sync(self, venue_id, reply_kinds=None):
+        return (self.venue_id != venue_id or not self.submissions or self.reply_kinds != reply_kinds
+                or self.syncs_since_full + 1 >= self.full_resync_every)
+
+    def reset(self, venue_id, submissions, reply_kinds=None):
+        """
+        Replace the store content with fully fetched submissions (with details['replies']),
+        whose replies are of `reply_kinds` only, or of every kind.
+        """
+        self.venue_id = venue_id
+        self.reply_kinds = reply_kinds
+        self.submissions, self.replies = {}, {}
+        for submission in submissions:
+            submission_json = note_to_json(submission)
+            replies = submission_json.pop('details', {}).get('replies', [])
+            self.submissions[submission.id] = submission_json
+            self.replies[submission.id] = {reply['id']: reply for reply in replies}
+        self.watermark = max(
+            [note['tmdate'] for note in self.submissions.values()]
+            + [reply['tmdate'] for replies in self.replies.values() for reply in replies.values()],
+            default=0
+        )
+        self.syncs_since_full = 0
+        self.save()
+
+    def sync(self, client, submission_invitation, reply_queries=None):
+        """
+        Merge the notes modified since the last sync, deleted ones are dropped.
+        Notes modified at the watermark itself are fetched again, so none is missed.
+
+        Without `reply_queries` every modified note of the venue is requested,
+        otherwise the modified submissions and the replies matching each query
+        (see reply_fetch.reply_queries), with the same projected fields as the
+        full fetch.
+        """
+        if reply_queries is None:
+            queries = [{'domain': self.venue_id}]
+        else:
+            queries = [{'invitation': submission_invitation}] + reply_queries
+        notes = (note for query in queries for note in iter_modified_notes(client, query, self.watermark))
+
+        watermark, updated = self.watermark, 0
+        for note in notes:
+            watermark = max(watermark, note['tmdate'])
+            deleted = note.get('ddate') is not None
+            if note['id'] == note['forum'] and submission_invitation in note['invitations']:
+                if deleted:
+                    self.submissions.pop(note['id'], None)
+                    self.replies.pop(note['id'], None)
+                else:
+                    self.submissions[note['id']] = note
+                    self.replies.setdefault(note['id'], {})
+            elif note['forum'] in self.replies:
+                if deleted:
+                    self.replies[note['forum']].pop(note['id'], None)
+                else:
+                    note.setdefault('content', {})
+                    self.replies[note['forum']][note['id']] = note
+            else:
+                continue
+            updated += 1
+
+        logger.info(f"Merged {updated} notes modified since {self.watermark}")
+        self.watermark = watermark
+        self.syncs_since_full += 1
+        self.save()
+
+    def get_submissions(self):
+        # Same shape as get_all_notes(..., details='replies')
+        return [
+            note_from_json({
+                **submission,
+                'details': {'replies': sorted(self.replies[sub_id].values(), key=lambda reply: reply['cdate'])}
+            })
+            for sub_id, submission in self.submissions.items()
+        ]
@@ -28,6 +28,11 @@ from src.constants import (
     MAX_TIME,
     MAX_TRIES,
 )
+from src.profile_cache import get_profiles_cached
+from src.async_client import run_async
+from src.request_cache import CachedOpenReviewClient
+from src.active_submissions import InactiveSubmissionIds, fetch_active_submissions, note_query
+from src.reply_fetch import fetch_replies, attach_replies, reply_queries
 # from oauth2client.service_account import ServiceAccountCredentials
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
@@ -61,14 +66,14 @@ def load_credentials():
 
 
 # ----- OpenReview general utils -----
-# Get the OpenReview client
+# Get the OpenReview client, its group and profile requests go through a short-lived in-memory cache
 def get_client():
     client = openreview.api.OpenReviewClient(
         baseurl='https://api2.openreview.net',
         username=os.environ['OPENREVIEW_USERNAME'],
         password=os.environ['OPENREVIEW_PASSWORD'],
     )
-    return client
+    return CachedOpenReviewClient(client)
 
 
 # Get the OpenReview venue group for a given venue ID
@@ -77,30 +82,54 @@ def get_venue_grp(client, venue_id):
     return venue_grp
 
 
-# ----- OpenReview review utils -----
-# Given a review content, return the number of words in the review
-def words_count(review_content):
-    length = 0
-    for text in review_content.values():
-        if 'value' not in text:
-            continue
-        text_value = text['value']
-        if isinstance(text_value, str):
-            length += len(re.findall(r'\b\w+\b', text_value))
-    return length
+# Replace the anonymous ids of an anonids group by the real members, the same way client.get_group does
+def resolve_anon_members(group, members_by_anonid):
+    members, anon_members = [], []
+    for member in group.members:
+        if member in members_by_anonid:
+            anon_members.append(member)
+            members.append(members_by_anonid[member])
+        else:
+            members.append(member)
+    return members, anon_members
 
 
+# ----- OpenReview review utils -----
 # Obtain all paper submissions for the venue
-def get_submissions(client, venue_id, venue_grp):
+# With a SubmissionStore, only the notes modified since the last call are fetched, except for periodic full resyncs
+# With `active_only`, withdrawn and desk rejected submissions are left out of full fetches (gs_main.py only,
+# the comprehensive report lists them)
+# With `reply_kinds` (see REPLY_KINDS), only the replies of these kinds are downloaded, also by store syncs
+def get_submissions(client, venue_id, venue_grp, store=None, active_only=False, reply_kinds=None):
     submission_name = venue_grp.content['submission_name']['value']
-    submissions = client.get_all_notes(invitation=f'{venue_id}/-/{submission_name}', details='replies')
+    invitation = f'{venue_id}/-/{submission_name}'
+    if store is not None and not store.needs_full_sync(venue_id, reply_kinds):
+        # The store syncs the same reply kinds and projected fields as a full fetch
+        queries = None if reply_kinds is None else reply_queries(venue_id, venue_grp, reply_kinds)
+        store.sync(client, invitation, queries)
+        return store.get_submissions()
+
+    details = 'replies' if reply_kinds is None else None
+    submissions = None
+    if active_only:
+        submissions = run_async(
+            client, fetch_active_submissions, venue_id, venue_grp, invitation, InactiveSubmissionIds.load(), details
+        )
+    if submissions is None:
+        # The pages of the query are requested concurrently
+        submissions = run_async(client, lambda async_client: async_client.get_all_notes(
+            **note_query(invitation, details)
+        ))
+    if reply_kinds is not None:
+        replies = run_async(client, fetch_replies, venue_id, venue_grp, reply_kinds)
+        attach_replies(submissions, replies)
+    if store is not None:
+        store.reset(venue_id, submissions, reply_kinds)
     return submissions
 
 
 # Process the submissions into a desired format for fetching wordcount information
-def process_submissions(submissions, venue_grp, venue_id):
-    submission_name = venue_grp.content['submission_name']['value']
-    review_name = venue_grp.content['review_name']['value']
+def process_submissions(submissions, venue_grp, reply_index):
     reviewers_anon_name = venue_grp.content['reviewers_anon_name']['value']
 
     rtn = {}
@@ -113,13 +142,11 @@ def process_submissions(submissions, venue_grp, venue_id):
 
         # Paper review
         reviews = {}
-        for reply in submission.details['replies']:
-            # Only show reviewers, not other types of replies
-            if f'{venue_id}/{submission_name}{submission.number}/-/{review_name}' in reply['invitations']:
-                # The key is the reviewer ID, and the value is the review content
-                reviewer_id = reply['writers'][-1].split('/')[-1]
-                assert reviewer_id.startswith(reviewers_anon_name), f"Unexpected reviewer ID: {reviewer_id}"
-                reviews[reviewer_id] = reply['content']
+        for reply in reply_index.reviews(submission.id):
+            # The key is the reviewer ID, and the value is the review content
+            reviewer_id = reply['writers'][-1].split('/')[-1]
+            assert reviewer_id.startswith(reviewers_anon_name), f"Unexpected reviewer ID: {reviewer_id}"
+            reviews[reviewer_id] = reply['content']
         submission_dict['reviews'] = reviews
 
         rtn[submission.id] = submission_dict
@@ -127,10 +154,13 @@ def process_submissions(submissions, venue_grp, venue_id):
 
 
 # ----- OpenReview User info utils -----
-def get_user_info(client, members):
-    profiles = openreview.tools.get_profiles(client, members)
+def get_user_info(client, members, profile_cache=None):
+    # Profiles come from the on-disk cache, only the missing or expired ones are fetched
+    # The batches of missing profiles are searched concurrently
+    fetch = lambda keys: run_async(client, lambda async_client: async_client.get_profiles(keys))
+    profiles = {profile.id: profile for profile in get_profiles_cached(client, members, profile_cache, fetch).values()}
     rtn = {}
-    for profile in profiles:
+    for profile in profiles.values():
         profile_dict = {}
         profile_dict['id'] = profile.id
         profile_dict['name'] = profile.content['names'][0]['fullname']
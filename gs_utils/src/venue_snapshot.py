@@ -0,0 +1,39 @@
+import os
+import gzip
+import json
+import openreview
+
+
+# ----- Snapshot (de)serialization utils -----
+# Note.to_json drops fields we rely on (number, tmdate, details), keep every attribute instead
+def note_to_json(note):
+    return {key: value for key, value in vars(note).items() if value is not None}
+
+
+def note_from_json(note_json):
+    return openreview.api.Note.from_json(note_json)
+
+
+def profile_to_json(profile):
+    return profile.to_json()
+
+
+def profile_from_json(profile_json):
+    return openreview.Profile.from_json(profile_json)
+
+
+def save_snapshot(path, data):
+    """
+    Write a snapshot as gzipped json. The file is written next to its final
+    location and renamed, so readers never see a partial snapshot.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,73 @@
+import os
+import re
+from src.constants import CACHE_DIR
+from src.venue_snapshot import save_snapshot, load_snapshot
+
+
+WORD_COUNT_MEMO_PATH = os.path.join(CACHE_DIR, 'word_counts.json.gz')
+
+# One tokenizer for every script: a word is a run of word characters
+WORD_PATTERN = re.compile(r'\w+')
+
+
+# ----- Word counting utils -----
+def count_words(text):
+    return len(WORD_PATTERN.findall(text))
+
+
+# Number of words over all the text fields of a note content
+def content_word_count(content):
+    length = 0
+    for field in content.values():
+        value = field.get('value')
+        if isinstance(value, str):
+            length += count_words(value)
+    return length
+
+
+# ----- Persistent word count memo -----
+class WordCountMemo:
+    """
+    Word counts of replies keyed by (reply id, mdate), persisted between runs.
+    Only replies that are new or were edited since they were last counted are
+    tokenized again; a reply's previous count is replaced when its mdate changes.
+    """
+
+    def __init__(self, path=WORD_COUNT_MEMO_PATH):
+        self.path = path
+        # reply id -> [mdate, word count]
+        self.counts = {}
+        self.stats = {'hits': 0, 'misses': 0}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path=WORD_COUNT_MEMO_PATH):
+        memo = cls(path)
+        if os.path.exists(path):
+            memo.counts = load_snapshot(path)
+        return memo
+
+    def save(self):
+        if self._dirty:
+            save_snapshot(self.path, self.counts)
+            self._dirty = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.save()
+
+    def count(self, reply):
+        # Replies that were never edited may come without an mdate
+        mdate = reply.get('mdate') or reply.get('tmdate')
+        cached = self.counts.get(reply['id'])
+        if cached is not None and cached[0] == mdate:
+            self.stats['hits'] += 1
+            return cached[1]
+
+        self.stats['misses'] += 1
+        word_count = content_word_count(reply['content'])
+        self.counts[reply['id']] = [mdate, word_count]
+        self._dirty = True
+        return word_count
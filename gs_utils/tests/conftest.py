@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The scripts import `src.*` and load logs/logging.conf relative to gs_utils, run the tests from there
+GS_UTILS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, GS_UTILS_DIR)
+os.chdir(GS_UTILS_DIR)
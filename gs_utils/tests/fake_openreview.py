@@ -0,0 +1,117 @@
+"""
+A small in-memory OpenReview venue for the tests: a synchronous client with
+the attributes AsyncOpenReviewClient and SubmissionStore use, and an httpx
+transport that answers the API requests made by the async client.
+"""
+import json
+import httpx
+import openreview
+
+VENUE_ID = 'test.org/Conference'
+SUBMISSION_INVITATION = f'{VENUE_ID}/-/Submission'
+VENUE_CONTENT = {
+    'submission_name': 'Submission',
+    'reviewers_anon_name': 'Reviewer_',
+    'review_name': 'Official_Review',
+    'meta_review_name': 'Meta_Review',
+}
+
+
+def make_submission(number, venueid, replies=()):
+    return {
+        'id': f'sub{number}', 'number': number, 'forum': f'sub{number}', 'cdate': number, 'tmdate': number,
+        'mdate': number, 'invitations': [SUBMISSION_INVITATION],
+        'content': {'title': {'value': f'Paper {number}'}, 'venueid': {'value': venueid}},
+        'details': {'replies': list(replies)},
+    }
+
+
+def make_reply(number, name, reply_id, content=None, signature=None, tmdate=None):
+    tmdate = tmdate or 100 + number
+    return {
+        'id': reply_id, 'forum': f'sub{number}', 'replyto': f'sub{number}', 'cdate': tmdate,
+        'tmdate': tmdate, 'mdate': tmdate,
+        'invitations': [f'{VENUE_ID}/Submission{number}/-/{name}'],
+        'signatures': [signature or f'{VENUE_ID}/Submission{number}/Authors'],
+        'writers': [VENUE_ID, signature or f'{VENUE_ID}/Submission{number}/Authors'],
+        'content': content or {},
+    }
+
+
+# The parent invitation of a per-submission invitation, e.g. `{venue}/Submission1/-/Official_Review`
+# extends `{venue}/-/Official_Review`, the server keeps it out of the note's own invitations
+def parent_invitation(invitation):
+    venue_id, name = invitation.split('/-/')
+    return f"{venue_id.rsplit('/', 1)[0]}/-/{name}" if venue_id != VENUE_ID else None
+
+
+# The fields of `note` in `fields`, e.g. ['id', 'content.title']
+def select(note, fields):
+    selected = {field: note[field] for field in fields if field in note}
+    content = [field.split('.', 1)[1] for field in fields if field.startswith('content.')]
+    if content:
+        selected['content'] = {key: note['content'][key] for key in content if key in note['content']}
+    return selected
+
+
+class FakeVenue:
+    def __init__(self, submissions):
+        self.submissions = submissions
+        self.requests = []
+
+    # ----- Synchronous client -----
+    baseurl = 'https://api.test'
+    notes_url = f'{baseurl}/notes'
+    headers = {}
+    limit = 1000
+
+    @property
+    def session(self):
+        return self
+
+    # requests.Session.get, answered by the same handler as the async client
+    def get(self, url, headers=None, params=None):
+        return self.handle(httpx.Request('GET', url, params=params))
+
+    def get_group(self, id):
+        return openreview.api.Group(
+            id=id, content={key: {'value': value} for key, value in VENUE_CONTENT.items()}
+        )
+
+    # ----- API served to the async client -----
+    def handle(self, request):
+        params = dict(request.url.params)
+        self.requests.append((request.url.path, params))
+        if request.url.path != '/notes':
+            return httpx.Response(404, json={'name': 'NotFoundError'})
+
+        if 'domain' in params:
+            notes = [{key: value for key, value in note.items() if key != 'details'} for note in self.submissions]
+            notes += [reply for note in self.submissions for reply in note['details']['replies']]
+        elif params.get('invitation') == SUBMISSION_INVITATION:
+            notes = [note for note in self.submissions
+                     if params.get('content.venueid') in [None, note['content']['venueid']['value']]]
+            if params.get('details') != 'replies':
+                notes = [{key: value for key, value in note.items() if key != 'details'} for note in notes]
+        else:
+            replies = [reply for note in self.submissions for reply in note['details']['replies']]
+            if 'parentInvitations' in params:
+                notes = [reply for reply in replies if params['parentInvitations'] in
+                         [parent_invitation(invitation) for invitation in reply['invitations']]]
+            else:
+                # `invitation` only matches the notes posted to that exact invitation
+                notes = [reply for reply in replies if params['invitation'] in reply['invitations']]
+        if params.get('sort') == 'tmdate:desc':
+            notes = sorted(notes, key=lambda note: note['tmdate'], reverse=True)
+        if 'select' in params:
+            notes = [select(note, params['select'].split(',')) for note in notes]
+
+        offset, limit = int(params.get('offset', 0)), int(params['limit'])
+        return httpx.Response(200, json=json.loads(json.dumps({'notes': notes[offset:offset + limit], 'count': len(notes)})))
+
+
+# Route the requests of every httpx.AsyncClient to the fake venue
+def serve(monkeypatch, venue):
+    async_client = httpx.AsyncClient
+    monkeypatch.setattr(httpx, 'AsyncClient',
+                        lambda **kwargs: async_client(transport=httpx.MockTransport(venue.handle), **kwargs))
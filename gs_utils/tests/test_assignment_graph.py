@@ -0,0 +1,29 @@
+from src.assignment_graph import AssignmentGraph
+
+
+def test_indexes_survive_a_save_and_load(tmp_path):
+    graph = AssignmentGraph()
+    graph.add_submission('sub1', acs=['~AC1'], reviewers=[('~R1', 'Reviewer_a')], sacs=['~SAC1'])
+    graph.add_submission('sub1b', acs=['~AC3'], reviewers=[('~R1', 'Reviewer_b'), ('~R2', 'Reviewer_c')])
+    graph.add_submission('sub2', acs=['~AC1'], sacs=['~SAC1'], active=False)
+    graph.add_submission('sub3', sacs=['~SAC1'])
+    graph.add_submission('sub4', acs=['~AC1', '~AC2'], sacs=['~SAC1'])
+    graph.add_submission('sub5')
+    graph.save(str(tmp_path / 'graph.json'))
+
+    for graph in [graph, AssignmentGraph.load(str(tmp_path / 'graph.json'))]:
+        assert graph.active_subs('~AC1') == ['sub1', 'sub4']
+        assert graph.active_subs('~AC2') == ['sub4']
+        assert graph.active_subs('~AC4') == []
+        assert graph.subs_of_reviewer('~R1') == ['sub1', 'sub1b'] and graph.subs_of_reviewer('~R3') == []
+        assert graph.unassigned_subs() == ['sub3', 'sub5']
+        assert graph.sacs_of('~AC1') == ['~SAC1'] and graph.sac2acs['~SAC1'] == ['~AC1', '~AC2']
+        assert not graph.is_active('sub2')
+
+
+def test_repeated_edges_are_added_once():
+    graph = AssignmentGraph()
+    graph.add_submission('sub1', acs=['~AC1', '~AC2'], sacs=['~SAC1'])
+    graph.add_submission('sub2', acs=['~AC1', '~AC2'], sacs=['~SAC1'])
+    assert graph.sacs_of('~AC1') == ['~SAC1'] and graph.sac2acs['~SAC1'] == ['~AC1', '~AC2']
+    assert graph.ac2subs['~AC1'] == ['sub1', 'sub2']
@@ -0,0 +1,25 @@
+from src.async_client import run_async
+from src.request_cache import CachedOpenReviewClient
+from fake_openreview import FakeVenue, VENUE_ID, SUBMISSION_INVITATION, make_submission, serve
+
+
+def test_one_limiter_serves_the_whole_cycle(monkeypatch):
+    venue = FakeVenue([make_submission(1, f'{VENUE_ID}/Submission')])
+    serve(monkeypatch, venue)
+    client = CachedOpenReviewClient(venue)
+
+    async def fetch(async_client):
+        assert async_client.limiter is client.limiter
+        return await async_client.get_all_notes_json(invitation=SUBMISSION_INVITATION)
+
+    # Each run has its own event loop, the limit learned by a run is where the next one starts
+    limits = []
+    for _ in range(3):
+        run_async(client, fetch)
+        limits.append(client.limiter._limit)
+    assert limits[0] < limits[1] < limits[2]
+
+    stats = client.limiter.pop_stats()
+    assert stats['requests'] == len(venue.requests) == 3
+    assert stats['throttled'] == stats['errors'] == 0
+    assert client.limiter.pop_stats()['requests'] == 0
@@ -0,0 +1,47 @@
+from src.cycle_snapshot import CycleSnapshot
+from fake_openreview import FakeVenue, VENUE_ID, make_submission, make_reply, serve
+
+
+def make_venue():
+    return FakeVenue([
+        make_submission(1, f'{VENUE_ID}/Submission'),
+        make_submission(2, f'{VENUE_ID}/Withdrawn_Submission', [make_reply(2, 'Withdrawal', 'withdrawal2')]),
+        make_submission(3, f'{VENUE_ID}/Desk_Rejected_Submission'),
+    ])
+
+
+def test_withdrawn_submissions_are_kept_by_default(monkeypatch):
+    # The comprehensive report fetches its snapshot with the defaults and reports withdrawn papers
+    venue = make_venue()
+    serve(monkeypatch, venue)
+
+    snapshot = CycleSnapshot.fetch(venue, VENUE_ID)
+
+    assert [submission.number for submission in snapshot.submissions] == [1, 2, 3]
+    assert snapshot.reply_index.has('sub2', 'withdrawals')
+    assert all('content.venueid' not in params for _, params in venue.requests)
+
+
+def test_active_only_leaves_inactive_submissions_out(monkeypatch, tmp_path):
+    venue = make_venue()
+    serve(monkeypatch, venue)
+    # The inactive ids are cached under the working directory
+    monkeypatch.chdir(tmp_path)
+
+    snapshot = CycleSnapshot.fetch(venue, VENUE_ID, active_only=True)
+
+    assert [submission.number for submission in snapshot.submissions] == [1]
+
+
+def test_targeted_fetch_sees_the_replies_of_per_submission_invitations(monkeypatch):
+    venue = FakeVenue([make_submission(1, f'{VENUE_ID}/Submission', [
+        make_reply(1, 'Official_Review', 'review1', {'review': {'value': 'Fine'}},
+                   signature=f'{VENUE_ID}/Submission1/Reviewer_a'),
+        make_reply(1, 'Official_Comment', 'comment1'),
+    ])])
+    serve(monkeypatch, venue)
+
+    snapshot = CycleSnapshot.fetch(venue, VENUE_ID, reply_kinds=['reviews'])
+
+    assert [reply['id'] for reply in snapshot.submissions[0].details['replies']] == ['review1']
+    assert snapshot.reply_index.has('sub1', 'reviews')
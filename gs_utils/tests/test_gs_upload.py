@@ -0,0 +1,61 @@
+import os
+import json
+import pandas as pd
+from src.gs_upload import gs_ac_upload
+from src.ac_data_store import ACDataStore, WORD_COUNT, PAPER_PROGRESS, REVIEW_PROGRESS
+from src.assignment_graph import AssignmentGraph
+from src.utils import format_progress
+
+
+def test_empty_word_count_table_is_not_retried(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('.cache')
+    AssignmentGraph().save()
+    with open(os.path.join('.cache', 'ac2gs.json'), 'w') as f:
+        json.dump({}, f)
+    with ACDataStore() as store:
+        store.write_frames(WORD_COUNT, {'~Empty_AC1': pd.DataFrame()})
+        assert store.dirty_acs() == {'~Empty_AC1': {WORD_COUNT}}
+
+    # No sheet is opened for the AC, its dirty flag is cleared all the same
+    gs_ac_upload(client=None)
+
+    with ACDataStore() as store:
+        assert store.dirty_acs() == {}
+
+
+def test_global_progress_change_only_rewrites_the_progress_rows(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('.cache')
+    graph = AssignmentGraph()
+    graph.add_submission('Submission1', acs=['~AC1'], sacs=['~SAC1'])
+    graph.save()
+    with open(os.path.join('.cache', 'ac2gs.json'), 'w') as f:
+        json.dump({'~AC1': 'https://sheet/ac1'}, f)
+    with ACDataStore() as store:
+        store.write_frames(WORD_COUNT, {'~AC1': pd.DataFrame({'Submission Number': [1], 'Reviewer 1': [100]})})
+        store.write_progress(PAPER_PROGRESS, {'~AC1': {'current': 0, 'total': 1}}, {'current': 0, 'total': 2})
+        store.write_progress(REVIEW_PROGRESS, {'~AC1': {'current': 0, 'total': 3}}, {'current': 0, 'total': 6})
+        store.mark_ac_uploaded('~AC1', ['~SAC1'])
+        store.mark_sac_uploaded('~SAC1')
+        store.mark_global_progress_uploaded()
+
+        # Another AC's paper got a review, only the global counter moved
+        store.write_progress(PAPER_PROGRESS, {'~AC1': {'current': 0, 'total': 1}}, {'current': 1, 'total': 2})
+        assert store.dirty_acs() == {}
+        assert store.global_progress_dirty()
+
+    writes = []
+    monkeypatch.setattr('src.gs_upload.open_spreadsheet', lambda client, url: url)
+    monkeypatch.setattr('src.gs_upload.open_or_create_worksheet', lambda spreadsheet, title: title)
+    monkeypatch.setattr('src.gs_upload.exec_func_w_backoff', lambda fn, *args, **kwargs: writes.append((args, kwargs)))
+    gs_ac_upload(client=None)
+
+    # A single update, the progress row of the word count sheet
+    assert len(writes) == 1
+    (worksheet, progress_df), kwargs = writes[0]
+    assert worksheet == 'Word Count' and kwargs['row'] > 1
+    assert progress_df['Paper Progress (Global)'][0] == format_progress(1, 2)
+    with ACDataStore() as store:
+        assert not store.global_progress_dirty()
+        assert store.dirty_sacs() == {}
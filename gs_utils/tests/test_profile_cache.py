@@ -0,0 +1,73 @@
+import openreview
+from src.profile_cache import ProfileCache, fetch_profiles
+
+
+def make_profile(profile_id, tmdate=1):
+    return openreview.Profile(id=profile_id, tmdate=tmdate, content={'names': [{'username': profile_id}]})
+
+
+class Server:
+    """The profiles known to OpenReview, and the keys of every request made."""
+
+    def __init__(self, profiles):
+        self.profiles = {profile.id: profile for profile in profiles}
+        self.fetched, self.checked = [], []
+
+    def fetch(self, keys):
+        self.fetched.append(list(keys))
+        return {key: self.profiles[key] for key in keys if key in self.profiles}
+
+    def fetch_tmdates(self, profile_ids):
+        self.checked.append(list(profile_ids))
+        return {profile_id: self.profiles[profile_id].tmdate for profile_id in profile_ids if profile_id in self.profiles}
+
+
+def test_ghost_ids_are_not_searched_again(tmp_path):
+    server = Server([make_profile('~Known1')])
+    with ProfileCache(str(tmp_path / 'profiles.sqlite')) as cache:
+        assert list(cache.get_many(['~Known1', '~Ghost1'], server.fetch)) == ['~Known1']
+        assert list(cache.get_many(['~Known1', '~Ghost1'], server.fetch)) == ['~Known1']
+    assert server.fetched == [['~Known1', '~Ghost1']]
+
+    # Once the miss expired the id is searched again, and found if the author created a profile since
+    server.profiles['~Ghost1'] = make_profile('~Ghost1')
+    with ProfileCache(str(tmp_path / 'profiles.sqlite'), miss_ttl=-1) as cache:
+        assert list(cache.get_many(['~Known1', '~Ghost1'], server.fetch)) == ['~Known1', '~Ghost1']
+    assert server.fetched[-1] == ['~Ghost1']
+
+
+def test_expired_profiles_are_only_fetched_when_modified(tmp_path):
+    server = Server([make_profile('~Same1'), make_profile('~Changed1')])
+    with ProfileCache(str(tmp_path / 'profiles.sqlite')) as cache:
+        cache.get_many(['~Same1', '~Changed1'], server.fetch)
+
+    server.profiles['~Changed1'] = make_profile('~Changed1', tmdate=2)
+    with ProfileCache(str(tmp_path / 'profiles.sqlite'), ttl=-1) as cache:
+        profiles = cache.get_many(['~Same1', '~Changed1'], server.fetch, server.fetch_tmdates)
+        assert cache.stats['unchanged'] == 1
+    assert server.checked == [['~Same1', '~Changed1']]
+    assert server.fetched[-1] == ['~Changed1']
+    assert profiles['~Changed1'].tmdate == 2
+
+
+class EmailSearchClient:
+    """Answers email searches like OpenReview, keyed by the lowercase confirmed emails."""
+
+    def __init__(self, profiles_by_email):
+        self.profiles_by_email = profiles_by_email
+
+    def search_profiles(self, ids=None, confirmedEmails=None):
+        return {email.lower(): self.profiles_by_email[email.lower()]
+                for email in confirmedEmails if email.lower() in self.profiles_by_email}
+
+
+def test_mixed_case_emails_are_matched_to_their_profile(tmp_path):
+    client = EmailSearchClient({'jane.doe@uni.edu': make_profile('~Jane_Doe1')})
+    keys = ['Jane.Doe@Uni.edu', 'ghost@uni.edu']
+    assert {key: profile.id for key, profile in fetch_profiles(client, keys).items()} == {'Jane.Doe@Uni.edu': '~Jane_Doe1'}
+
+    # The requested spelling is cached, so the next lookup is a hit and not a ghost
+    with ProfileCache(str(tmp_path / 'profiles.sqlite')) as cache:
+        cache.get_many(keys, lambda keys: fetch_profiles(client, keys))
+        assert list(cache.get_many(keys, lambda keys: {})) == ['Jane.Doe@Uni.edu']
+        assert cache.stats['hits'] == 1 and cache.stats['known_missing'] == 1
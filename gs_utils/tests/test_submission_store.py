@@ -0,0 +1,42 @@
+from src.utils import get_submissions
+from src.submission_store import SubmissionStore
+from fake_openreview import FakeVenue, VENUE_ID, make_submission, make_reply, serve
+
+
+def meta_review(number, reply_id, tmdate=None):
+    return make_reply(number, 'Meta_Review', reply_id, tmdate=tmdate, content={
+        'recommendation': {'value': 'Accept'}, 'confidence': {'value': 4}, 'metareview': {'value': 'Long text'},
+    })
+
+
+def test_store_sync_keeps_the_reply_kinds_and_projection(monkeypatch, tmp_path):
+    venue = FakeVenue([
+        make_submission(1, f'{VENUE_ID}/Submission', [meta_review(1, 'meta1')]),
+        make_submission(2, f'{VENUE_ID}/Submission'),
+    ])
+    serve(monkeypatch, venue)
+    venue_grp = venue.get_group(VENUE_ID)
+    store = SubmissionStore(path=str(tmp_path / 'store.json.gz'))
+    get_submissions(venue, VENUE_ID, venue_grp, store, reply_kinds=['meta_reviews'])
+
+    # A meta review and a comment posted after the full fetch
+    venue.submissions[1]['details']['replies'] += [
+        meta_review(2, 'meta2', tmdate=500),
+        make_reply(2, 'Official_Comment', 'comment2', content={'comment': {'value': 'Hi'}}, tmdate=500),
+    ]
+    venue.requests.clear()
+    submissions = get_submissions(venue, VENUE_ID, venue_grp, store, reply_kinds=['meta_reviews'])
+
+    assert all('domain' not in params for _, params in venue.requests)
+    replies = {reply['id']: reply for submission in submissions for reply in submission.details['replies']}
+    assert sorted(replies) == ['meta1', 'meta2']
+    assert sorted(replies['meta2']['content']) == sorted(replies['meta1']['content']) == ['confidence', 'recommendation']
+
+
+def test_store_is_rebuilt_when_the_reply_kinds_change(tmp_path):
+    store = SubmissionStore(path=str(tmp_path / 'store.json.gz'))
+    store.reset(VENUE_ID, [], reply_kinds=['meta_reviews'])
+    store.submissions['sub1'] = {}
+
+    assert not store.needs_full_sync(VENUE_ID, ['meta_reviews'])
+    assert store.needs_full_sync(VENUE_ID)
@@ -8,6 +8,14 @@ import os
 import csv
 import statistics
 
+# The profile cache is shared with the Google Sheets pipeline in gs_utils
+GS_UTILS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gs_utils')
+sys.path.append(GS_UTILS_DIR)
+from src.constants import CACHE_DIR
+from src.profile_cache import get_profiles_cached, ProfileCache
+
+PROFILE_CACHE_PATH = os.path.join(GS_UTILS_DIR, CACHE_DIR, 'profiles.sqlite')
+
 conf_id = "acmmm.org/ACMMM/2024/Conference/"
 
 # Login for users
@@ -24,30 +32,28 @@ def get_client():
         password="langlang427739"
     )
 
+# Get the profiles of a group's members, served from the on-disk profile cache when possible
+def get_group_profiles(client, group_id, profile_cache=None):
+    group = client.get_group(group_id)
+    profiles = get_profiles_cached(client, group.members, profile_cache)
+    # Members may refer to the same profile with different ids or emails
+    return list({profile.id: profile for profile in profiles.values()}.values())
+
 # Get profiles of Senior Area Chairs (SAC)
-def get_sac_profiles(client):
-    sacs = client.get_group(conf_id + "Senior_Area_Chairs")
-    profiles = openreview.tools.get_profiles(
-        client, ids_or_emails=sacs.members, with_publications=True
-    )
+def get_sac_profiles(client, profile_cache=None):
+    profiles = get_group_profiles(client, conf_id + "Senior_Area_Chairs", profile_cache)
     print("SACs=", len(profiles), file=sys.stderr)
     return profiles
 
 # Get profiles of Area Chairs (AC)
-def get_ac_profiles(client):
-    acs = client.get_group(conf_id + "Area_Chairs")
-    profiles = openreview.tools.get_profiles(
-        client, ids_or_emails=acs.members, with_publications=True
-    )
+def get_ac_profiles(client, profile_cache=None):
+    profiles = get_group_profiles(client, conf_id + "Area_Chairs", profile_cache)
     print("ACs=", len(profiles), file=sys.stderr)
     return profiles
 
 # Get profiles of Reviewers
-def get_r_profiles(client):
-    reviewers = client.get_group(conf_id + "Reviewers")
-    profiles = openreview.tools.get_profiles(
-        client, ids_or_emails=reviewers.members, with_publications=True
-    )
+def get_r_profiles(client, profile_cache=None):
+    profiles = get_group_profiles(client, conf_id + "Reviewers", profile_cache)
     print("Reviewers=", len(profiles), file=sys.stderr)
     return profiles
 
@@ -73,16 +79,20 @@ def submission_stats(client):
     print('Total Submissions:', total, 'Total PDFs:', total_pdf)
 
 # Submission statistics by country
-def submission_country_stats(client):
+def submission_country_stats(client, profile_cache=None):
     map_domain_country = {}
     with open('map_domain_country.csv') as f:
         for domain, country in csv.reader(f):
             map_domain_country[domain.strip()] = country.strip()
     
     submissions = client.get_all_notes(invitation=conf_id + "-/Submission")
+    first_authors = get_profiles_cached(
+        client, [sub.content['authorids']['value'][0] for sub in submissions], profile_cache)
     for sub in submissions:
         author_id = sub.content['authorids']['value'][0]
-        profile = client.get_profile(author_id)
+        if author_id not in first_authors:
+            continue
+        profile = first_authors[author_id]
         email_domain = profile.content.get('preferredEmail', 'N/A').split('@')[-1].split('.')[-1]
         country = map_domain_country.get(email_domain, 'Unknown')
         if 'pdf' in sub.content and 'Withdrawn' not in sub.content['venueid']['value']:
@@ -91,9 +101,10 @@ def submission_country_stats(client):
 # Main execution
 def main():
     client = get_client()
-    sac_profiles = get_sac_profiles(client)
-    ac_profiles = get_ac_profiles(client)
-    r_profiles = get_r_profiles(client)
+    with ProfileCache(PROFILE_CACHE_PATH) as profile_cache:
+        sac_profiles = get_sac_profiles(client, profile_cache)
+        ac_profiles = get_ac_profiles(client, profile_cache)
+        r_profiles = get_r_profiles(client, profile_cache)
     profile_check(sac_profiles + ac_profiles + r_profiles)
     submission_stats(client)
     
@@ -0,0 +1,153 @@
+import os
+import csv
+import sys
+import httpx
+import pytest
+import xml.etree.ElementTree as ET
+import openreview
+import ExportMeta_toXML as export
+from affiliation_index import AffiliationIndex
+
+VENUE_ID = 'acmmm.org/ACMMM/2024/Conference'
+
+
+def make_note(number, venueid, authorids):
+    return openreview.api.Note(
+        id=f'note{number}', number=number, mdate=number,
+        content={
+            'title': {'value': f'Paper {number}'},
+            'venueid': {'value': venueid},
+            'authorids': {'value': authorids},
+            'authors': {'value': [author_id.strip('~') for author_id in authorids]},
+        },
+    )
+
+
+def make_profile(profile_id):
+    return openreview.Profile(id=profile_id, tmdate=1, content={
+        'names': [{'first': 'Ada', 'last': profile_id.strip('~'), 'username': profile_id}],
+        'preferredEmail': f'{profile_id.strip("~").lower()}@example.org',
+        'emails': [f'{profile_id.strip("~").lower()}@example.org'],
+        'history': [{'institution': {'name': 'University', 'domain': 'example.org'}}],
+    })
+
+
+class FakeClient:
+    """Answers like the OpenReview API: a content filter only matches notes with these content values."""
+
+    def __init__(self, notes, profiles):
+        self.notes = notes
+        self.profiles = {profile.id: profile for profile in profiles}
+
+    def get_all_notes(self, content=None, **params):
+        notes = self.notes
+        for key, value in (content or {}).items():
+            notes = [note for note in notes if note.content[key]['value'] == value]
+        return notes
+
+    def search_profiles(self, ids=None, confirmedEmails=None):
+        if ids is not None:
+            return [self.profiles[profile_id] for profile_id in ids if profile_id in self.profiles]
+        return {}
+
+    # The profile tmdate lookup, see fetch_profile_tmdates
+    profiles_search_url = '/profiles/search'
+    headers = {}
+
+    @property
+    def session(self):
+        return self
+
+    def post(self, url, json=None, params=None, headers=None):
+        profiles = [{'id': profile_id, 'tmdate': self.profiles[profile_id].tmdate}
+                    for profile_id in json['ids'] if profile_id in self.profiles]
+        return httpx.Response(200, json={'profiles': profiles})
+
+
+def exported_numbers(xml_file_path):
+    return [int(paper.findtext('event_tracking_number')) for paper in ET.parse(xml_file_path).getroot().iter('paper')]
+
+
+def test_only_accepted_papers_are_exported(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    notes = [
+        make_note(1, VENUE_ID, ['~Accepted1']),
+        make_note(2, f'{VENUE_ID}/Rejected_Submission', ['~Rejected1']),
+        make_note(3, f'{VENUE_ID}/Withdrawn_Submission', ['~Withdrawn1']),
+        make_note(4, f'{VENUE_ID}/Desk_Rejected_Submission', ['~Desk1']),
+        make_note(5, VENUE_ID, ['~Accepted2']),
+    ]
+    client = FakeClient(notes, [make_profile(f'~{name}') for name in
+                                ['Accepted1', 'Rejected1', 'Withdrawn1', 'Desk1', 'Accepted2']])
+    tracks = [(VENUE_ID, 'main')]
+
+    track_notes, profile_map, timings = export.fetch_tracks(client, tracks, max_workers=1)
+    export.export_tracks(track_notes, profile_map, timings, max_workers=1)
+    assert exported_numbers('ACMMM_2024_Conference_main_paperLoad.xml') == [1, 5]
+
+    # An incremental run and its Sheridan delta only see the accepted papers as well
+    export.export_tracks(track_notes, profile_map, max_workers=1, incremental=True, write_delta=True)
+    assert exported_numbers('ACMMM_2024_Conference_main_paperLoad.xml') == [1, 5]
+    assert exported_numbers('ACMMM_2024_Conference_main_delta_paperLoad.xml') == []
+
+
+def ghost_report(path='ACMMM_2024_Conference_main_ghost_authors.csv'):
+    with open(path, newline='') as f:
+        return [row[:3] for row in csv.reader(f)][1:]
+
+
+def test_incremental_run_keeps_the_ghosts_of_every_paper(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    notes = [make_note(1, VENUE_ID, ['~Ghost1', '~Known1']), make_note(2, VENUE_ID, ['~Known1', '~Ghost2'])]
+    profile_map = {'~Known1': make_profile('~Known1')}
+
+    export.export_track(VENUE_ID, 'main', notes, profile_map, max_workers=1)
+    assert ghost_report() == [['1', '1', '~Ghost1'], ['2', '2', '~Ghost2']]
+
+    # Only paper 2 is rendered again, the report still lists the ghost of paper 1
+    notes[1] = make_note(2, VENUE_ID, ['~Known1', '~Ghost2', '~Ghost3'])
+    notes[1].mdate = 10
+    ghosts, rendered = export.export_track(VENUE_ID, 'main', notes, profile_map, max_workers=1, incremental=True)
+    assert rendered == 1 and ghosts == 3
+    assert ghost_report() == [['1', '1', '~Ghost1'], ['2', '2', '~Ghost2'], ['2', '3', '~Ghost3']]
+
+    # Once no paper has ghost authors, the stale report is removed
+    profile_map.update({ghost: make_profile(ghost) for ghost in ['~Ghost1', '~Ghost2', '~Ghost3']})
+    export.export_track(VENUE_ID, 'main', notes, profile_map, max_workers=1, incremental=True)
+    assert not os.path.exists('ACMMM_2024_Conference_main_ghost_authors.csv')
+
+
+def test_affiliation_map_change_renders_every_paper_again(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    notes = [make_note(1, VENUE_ID, ['~Known1']), make_note(2, VENUE_ID, ['~Known2'])]
+    profile_map = {profile_id: make_profile(profile_id) for profile_id in ['~Known1', '~Known2']}
+    index = AffiliationIndex()
+    export.export_track(VENUE_ID, 'main', notes, profile_map, max_workers=1, affiliation_index=index)
+
+    _, rendered = export.export_track(VENUE_ID, 'main', notes, profile_map, max_workers=1, incremental=True,
+                                      affiliation_index=index)
+    assert rendered == 0
+
+    index.add_domain('example.org', {'country': 'Australia'})
+    _, rendered = export.export_track(VENUE_ID, 'main', notes, profile_map, max_workers=1, incremental=True,
+                                      affiliation_index=index)
+    assert rendered == 2
+    countries = [country.text for country in ET.parse('ACMMM_2024_Conference_main_paperLoad.xml').iter('country')]
+    assert countries == ['Australia', 'Australia']
+
+
+def test_incremental_run_rejects_a_paper_selection(monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['ExportMeta_toXML.py', '--incremental', '--papers', '2'])
+    with pytest.raises(SystemExit):
+        export.parse_args()
+
+
+def test_author_email_is_the_preferred_one():
+    profile = make_profile('~Known1')
+    profile.content['emails'] = ['old@example.org', 'known1@example.org']
+    assert export.build_author(profile, 0).findtext('email_address') == 'known1@example.org'
+
+    # Without a preferred email the first one is exported, and the validator reports it
+    del profile.content['preferredEmail']
+    assert export.build_author(profile, 0).findtext('email_address') == 'old@example.org'
+    assert export.preferred_email(profile) is None
@@ -0,0 +1,72 @@
+import os
+import ExportMeta_toXML as export
+import validate_paperLoad as validator
+from src.profile_cache import ProfileCache
+from test_export import VENUE_ID, FakeClient, make_note, make_profile
+
+
+def test_accepted_papers_are_checked_before_any_export(tmp_path, monkeypatch):
+    # No manifest nor XML in the working directory
+    monkeypatch.chdir(tmp_path)
+    no_email = make_profile('~NoEmail1')
+    del no_email.content['preferredEmail']
+    client = FakeClient(
+        [make_note(1, VENUE_ID, ['~Known1', '~Ghost1']), make_note(2, VENUE_ID, ['~NoEmail1']),
+         make_note(3, f'{VENUE_ID}/Rejected_Submission', ['~Ghost2'])],
+        [make_profile('~Known1'), no_email],
+    )
+    track_notes, profile_map, _ = export.fetch_tracks(client, [(VENUE_ID, 'main')], max_workers=1)
+
+    records = validator.load_author_records(track_notes, profile_map)
+    issues = validator.validate(records)
+
+    assert records['event_tracking_number'].tolist() == [1, 1, 2]
+    assert issues[['event_tracking_number', 'author_id', 'reason']].values.tolist() == [
+        [1, '~Ghost1', 'No profile (ghost author)'],
+        [2, '~NoEmail1', 'No preferred email'],
+    ]
+
+
+def test_profile_fixes_are_seen_through_the_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    profile = make_profile('~Known1')
+    del profile.content['preferredEmail']
+    client = FakeClient([make_note(1, VENUE_ID, ['~Known1'])], [profile])
+    tracks = [(VENUE_ID, 'main')]
+
+    def issues(profile_cache):
+        track_notes, profile_map, _ = export.fetch_tracks(client, tracks, max_workers=1, profile_cache=profile_cache)
+        return validator.validate(validator.load_author_records(track_notes, profile_map))['reason'].tolist()
+
+    with ProfileCache(str(tmp_path / 'profiles.sqlite')) as profile_cache:
+        assert issues(profile_cache) == ['No preferred email']
+
+    # The author sets a preferred email, the next run revalidates the cached profile
+    fixed = make_profile('~Known1')
+    fixed.tmdate = 2
+    client.profiles['~Known1'] = fixed
+    with ProfileCache(str(tmp_path / 'profiles.sqlite'), ttl=0) as profile_cache:
+        assert issues(profile_cache) == []
+
+
+def test_offline_run_reads_the_snapshot_and_the_profile_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    no_email = make_profile('~Known1')
+    del no_email.content['preferredEmail']
+    notes = [make_note(1, VENUE_ID, ['~Known1', '~Old1', '~Ghost1'])]
+    profiles = {'~Known1': no_email, '~Old1': make_profile('~Old1')}
+    export.save_export_snapshot('snapshot.json.gz', {(VENUE_ID, 'main'): notes}, profiles)
+
+    # The snapshot profile of ~Old1 is too old to be trusted
+    os.utime('snapshot.json.gz', (0, 0))
+    with ProfileCache(str(tmp_path / 'profiles.sqlite')) as profile_cache:
+        # ~Known1 fixed their profile after the snapshot, the cache has the fix
+        profile_cache.put([make_profile('~Known1')])
+        track_notes, profile_map, stale = validator.load_cached_inputs(
+            'snapshot.json.gz', [(VENUE_ID, 'main')], profile_cache, max_age=60)
+
+    issues = validator.validate(validator.load_author_records(track_notes, profile_map, stale))
+    assert issues[['author_id', 'reason']].values.tolist() == [
+        ['~Old1', 'Cached profile older than --max-age, rerun with --refresh'],
+        ['~Ghost1', 'No profile (ghost author)'],
+    ]
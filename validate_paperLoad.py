@@ -0,0 +1,211 @@
+"""
+Pre-flight check of the author records that go into paperLoad XML files.
+
+By default no OpenReview request is made: the accepted papers come from the
+export snapshot (see ExportMeta_toXML.py --save-snapshot) and the author
+profiles from the on-disk profile cache, or from the snapshot when the cache
+does not have them. Profiles cached longer than --max-age ago are refused
+and reported, rather than checked. --refresh fetches the papers again, with
+the export's own fetch_tracks, revalidates every cached profile with its
+tmdate and saves the snapshot for the next offline runs.
+
+All author records are checked at once with vectorized pandas operations,
+reporting every record that would produce:
+    - no profile at all (ghost author)
+    - an `N/A` first or last name
+    - a single-token fullname split (empty first name)
+    - an empty or `N/A` institution
+    - a missing preferred email
+    - a malformed ORCID or one with a wrong checksum
+
+Refresh once after every round of profile-fix emails, then rerun offline, e.g.
+    python validate_paperLoad.py --track acmmm.org/ACMMM/2024/Conference main --refresh
+    python validate_paperLoad.py --track acmmm.org/ACMMM/2024/Conference main
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# The profile cache lives in gs_utils, set up the path here rather than rely on the exporter doing it
+GS_UTILS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gs_utils')
+if GS_UTILS_DIR not in sys.path:
+    sys.path.append(GS_UTILS_DIR)
+from src.constants import PROFILE_CACHE_TTL
+from src.profile_cache import ProfileCache
+from ExportMeta_toXML import (
+    VENUE_ID,
+    TRACK_NAME,
+    MAX_WORKERS,
+    PROFILE_CACHE_PATH,
+    EXPORT_SNAPSHOT_PATH,
+    get_client,
+    fetch_tracks,
+    save_export_snapshot,
+    load_export_snapshot,
+    current_history,
+    preferred_email,
+)
+
+
+ORCID_PATTERN = r'^\d{4}-\d{4}-\d{4}-\d{3}[\dX]$'
+
+
+# Offline: the notes of the snapshot and the most recently fetched profile of each author, from the
+# profile cache or the snapshot. Returns the notes, the profiles younger than `max_age` seconds and the
+# authors whose profile is older
+def load_cached_inputs(snapshot_path, tracks, profile_cache, max_age=PROFILE_CACHE_TTL):
+    if not os.path.exists(snapshot_path):
+        raise SystemExit(f"No snapshot at {snapshot_path}, run with --refresh first")
+    track_notes, snapshot_profiles = load_export_snapshot(snapshot_path, tracks)
+    author_ids = list(dict.fromkeys(author_id for notes in track_notes.values() for note in notes
+                                    for author_id in note.content.get('authorids', {}).get('value', [])))
+
+    snapshot_time = os.path.getmtime(snapshot_path)
+    cached = {key: (snapshot_profiles[key], snapshot_time) for key in author_ids if key in snapshot_profiles}
+    for key, (profile, fetched_at) in profile_cache.lookup(author_ids).items():
+        if key not in cached or fetched_at > cached[key][1]:
+            cached[key] = (profile, fetched_at)
+
+    now = time.time()
+    profile_map = {key: profile for key, (profile, fetched_at) in cached.items() if now - fetched_at <= max_age}
+    stale = {key for key in cached if key not in profile_map}
+    return track_notes, profile_map, stale
+
+
+# One row per author record, from the notes and profiles the export would use (see fetch_tracks),
+# the fields are read with the same defaults as the exporter, `stale` authors are flagged instead
+def load_author_records(track_notes, profile_map, stale=()):
+    rows = []
+    for (venue_id, track_name), notes in track_notes.items():
+        for note in sorted(notes, key=lambda note: note.number):
+            for i, author_id in enumerate(note.content.get('authorids', {}).get('value', [])):
+                rows.append((track_name, note.number, i + 1, author_id))
+    records = pd.DataFrame(rows, columns=['track', 'event_tracking_number', 'sequence_no', 'author_id'])
+    records['stale'] = records['author_id'].isin(stale)
+
+    fields = {}
+    for author_id in records['author_id'].unique():
+        profile = profile_map.get(author_id)
+        if profile is None:
+            continue
+        name = profile.content.get('names', [{}])[0]
+        # Every current position becomes an <affiliation>, keep the first empty one if any
+        institutions = [entry.get('institution', {}).get('name', 'N/A') for entry in current_history(profile)]
+        empty_institutions = [name for name in institutions if name.strip() in ['', 'N/A']]
+        fields[author_id] = {
+            'first': name.get('first', 'N/A'),
+            'last': name.get('last', 'N/A'),
+            'fullname': name.get('fullname', 'N/A'),
+            'institution': empty_institutions[0] if empty_institutions else institutions[0],
+            'preferred_email': preferred_email(profile) or '',
+            'orcid': profile.content.get('orcid', ''),
+        }
+    profile_fields = pd.DataFrame.from_dict(
+        fields, orient='index',
+        columns=['first', 'last', 'fullname', 'institution', 'preferred_email', 'orcid']
+    )
+    return records.join(profile_fields, on='author_id')
+
+
+# Vectorized ORCID checksum (ISO 7064 MOD 11-2) on a series of well-formed ids
+def orcid_checksum_ok(orcids):
+    if orcids.empty:
+        return pd.Series([], dtype=bool, index=orcids.index)
+    digits = orcids.str.replace('-', '', regex=False)
+    body = np.array([list(map(int, d[:15])) for d in digits])
+    total = np.zeros(len(body), dtype=int)
+    for col in range(15):
+        total = (total + body[:, col]) * 2
+    check = (12 - total % 11) % 11
+    expected = np.where(check == 10, 'X', check.astype(str))
+    return pd.Series((expected == digits.str[15].to_numpy()).astype(bool), index=orcids.index)
+
+
+def validate(records):
+    """
+    Returns one row per problem found, with the track, paper, author and reason.
+    """
+    missing = records['first'].isna()
+    ghost = missing & ~records['stale']
+    valid = records[~missing]
+
+    use_fullname = (valid['first'] == 'N/A') & (valid['last'] == 'N/A')
+    fullname_tokens = valid['fullname'].str.split().str.len().fillna(0)
+    orcid = valid['orcid'].fillna('').str.strip().str.split('/').str[-1]
+    well_formed = orcid.str.match(ORCID_PATTERN)
+    checksum_ok = orcid_checksum_ok(orcid[well_formed]).reindex(valid.index, fill_value=True)
+
+    checks = {
+        'No profile (ghost author)': ghost,
+        'Cached profile older than --max-age, rerun with --refresh': records['stale'],
+        'N/A first or last name': (
+            (~use_fullname & ((valid['first'] == 'N/A') | (valid['last'] == 'N/A')))
+            | (use_fullname & ((valid['fullname'] == 'N/A') | (fullname_tokens == 0)))
+        ),
+        'Single-token fullname, empty first name': use_fullname & (fullname_tokens == 1),
+        'Empty institution': valid['institution'].fillna('').str.strip().isin(['', 'N/A']),
+        'No preferred email': valid['preferred_email'].fillna('') == '',
+        'Bad ORCID': (orcid != '') & ~(well_formed & checksum_ok),
+    }
+
+    issues = []
+    for reason, mask in checks.items():
+        mask = mask.reindex(records.index, fill_value=False)
+        rows = records.loc[mask, ['track', 'event_tracking_number', 'sequence_no', 'author_id']].copy()
+        rows['reason'] = reason
+        issues.append(rows)
+    return pd.concat(issues).sort_values(['track', 'event_tracking_number', 'sequence_no'])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Validate the author records of tracks before exporting them, '
+                                                 'offline unless --refresh is given.')
+    parser.add_argument('--track', nargs=2, action='append', dest='tracks', metavar=('VENUE_ID', 'TRACK_NAME'),
+                        help='venue id and track name to validate, can be repeated (default: VENUE_ID TRACK_NAME)')
+    parser.add_argument('--snapshot', default=EXPORT_SNAPSHOT_PATH,
+                        help='export snapshot the papers are read from, and saved to by --refresh')
+    parser.add_argument('--max-age', type=float, default=PROFILE_CACHE_TTL,
+                        help='offline, cached profiles older than this many seconds are reported instead of checked')
+    parser.add_argument('--refresh', action='store_true',
+                        help='fetch the papers from OpenReview and revalidate every cached profile with its tmdate')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='with --refresh, fetch every profile instead of revalidating the on-disk profile cache')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help='number of worker threads, 1 for a serial run')
+    parser.add_argument('--output', default='paperLoad_validation.csv', help='where to write the issue report')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    tracks = [tuple(track) for track in args.tracks] if args.tracks else [(VENUE_ID, TRACK_NAME)]
+
+    stale = set()
+    if not args.refresh:
+        with ProfileCache(PROFILE_CACHE_PATH) as profile_cache:
+            track_notes, profile_map, stale = load_cached_inputs(args.snapshot, tracks, profile_cache, args.max_age)
+    elif args.no_cache:
+        track_notes, profile_map, _ = fetch_tracks(get_client(), tracks, max_workers=args.workers)
+    else:
+        # Every cached profile is revalidated with its tmdate, only the modified ones are downloaded
+        with ProfileCache(PROFILE_CACHE_PATH, ttl=0) as profile_cache:
+            track_notes, profile_map, _ = fetch_tracks(get_client(), tracks, max_workers=args.workers,
+                                                       profile_cache=profile_cache)
+    if args.refresh:
+        save_export_snapshot(args.snapshot, track_notes, profile_map)
+        print(f"Snapshot saved to {args.snapshot}")
+    records = load_author_records(track_notes, profile_map, stale)
+    issues = validate(records)
+    issues.to_csv(args.output, index=False)
+
+    print(f"Checked {len(records)} author records in {records['event_tracking_number'].nunique()} papers")
+    for reason, count in issues['reason'].value_counts().items():
+        print(f"{count:>6}  {reason}")
+    print(f"Report saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()